@@ -1,34 +1,127 @@
+import json
 import os
+import threading
 import time
+from collections import OrderedDict
+from typing import Optional
 
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 # --- Configuration ---
 # Assumes the FastAPI server is running locally on port 8000
 API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
 
+# (connect, read) timeouts: an unreachable API fails fast, while slow agent responses still get time to arrive
+API_CONNECT_TIMEOUT_SECONDS = 5
+QUERY_TIMEOUT = (API_CONNECT_TIMEOUT_SECONDS, 60)
+API_TIMEOUT = (API_CONNECT_TIMEOUT_SECONDS, 15)
+
+# Final /query answers are reused app-wide for identical queries (the endpoint is user-agnostic)
+QUERY_CACHE_TTL_SECONDS = 3600
+QUERY_CACHE_MAX_ENTRIES = 128
+
+# Analysis status polling: the status fragment ticks every POLL_TICK_SECONDS, but the API is only called once
+# the current interval has elapsed; the interval grows while the status is unchanged (2s up to 30s)
+ACTIVE_TASK_STATUSES = ("PENDING", "RUNNING")
+POLL_TICK_SECONDS = 2
+POLL_INITIAL_INTERVAL_SECONDS = 2
+POLL_MAX_INTERVAL_SECONDS = 30
+POLL_BACKOFF_FACTOR = 1.5
+# Each poll asks the API to hold the request until the status changes, for at most this long. Kept short so a
+# poll never occupies the fragment for long, while a completion during the wait is still seen immediately.
+LONG_POLL_WAIT_SECONDS = 5
+
 # --- Helper Functions ---
 
 
-def query_agent(query: str):
-    """Sends a query to the FastAPI /query endpoint."""
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """Returns the HTTP session shared by all sessions of this Streamlit process.
+
+    Streamlit re-executes the script on every interaction; st.cache_resource keeps a single session (and its
+    pool of keep-alive connections to the API) alive across reruns and users.
+    Only idempotent requests (GET) are retried on gateway errors; POSTs are never resent.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class QueryResponseCache:
+    """A small thread-safe LRU of final agent responses by query, with entries expiring after a TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                return None
+            self._entries.move_to_end(query)
+            return entry[1]
+
+    def set(self, query: str, response: str) -> None:
+        with self._lock:
+            self._entries[query] = (time.monotonic(), response)
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@st.cache_resource
+def get_query_response_cache() -> QueryResponseCache:
+    """Returns the response cache shared by all sessions of this Streamlit process.
+
+    A streamed response cannot be memoized with st.cache_data, so the final answers are cached explicitly.
+    """
+    return QueryResponseCache(QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL_SECONDS)
+
+
+def stream_query_agent(query: str, result: dict):
+    """Streams the agent's tokens from the FastAPI /query/stream endpoint (Server-Sent Events).
+
+    Yields the tokens as they arrive; the final event ({"response": ...} or {"error": ...}) is stored in result.
+    """
     try:
-        response = requests.post(f"{API_BASE_URL}/query", json={"query": query}, timeout=60)  # Add timeout
-        response.raise_for_status()  # Raise exception for bad status codes
-        return response.json().get("response", "No response field found.")
+        with get_http_session().post(
+            f"{API_BASE_URL}/query/stream", json={"query": query}, stream=True, timeout=QUERY_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data: "):
+                    continue
+                event = json.loads(line[len("data: ") :])
+                if "token" in event:
+                    yield event["token"]
+                else:
+                    result.update(event)
     except requests.exceptions.RequestException as e:
-        st.error(f"Error connecting to API: {e}")
-        return None
+        result["error"] = f"Error connecting to API: {e}"
     except Exception as e:
-        st.error(f"An unexpected error occurred during query: {e}")
-        return None
+        result["error"] = f"An unexpected error occurred during query: {e}"
 
 
 def submit_analysis_request(industry: str):
     """Submits an analysis request to the FastAPI /analyze endpoint."""
     try:
-        response = requests.post(f"{API_BASE_URL}/analyze", json={"industry": industry}, timeout=15)
+        response = get_http_session().post(f"{API_BASE_URL}/analyze", json={"industry": industry}, timeout=API_TIMEOUT)
         response.raise_for_status()
         return response.json()  # Returns {"message": "...", "task_id": "..."}
     except requests.exceptions.RequestException as e:
@@ -39,12 +132,16 @@ def submit_analysis_request(industry: str):
         return None
 
 
-def get_analysis_status(task_id: str):
-    """Gets the status of an analysis task from the FastAPI /analysis/{task_id} endpoint."""
+def get_analysis_status(task_id: str, last_status: Optional[str] = None):
+    """Gets the status of an analysis task from the FastAPI /analysis/{task_id} endpoint.
+
+    If last_status is given, the API waits (long-polls) briefly for the status to change before answering.
+    """
     if not task_id:
         return None
+    params = {"wait": LONG_POLL_WAIT_SECONDS, "last_status": last_status} if last_status else None
     try:
-        response = requests.get(f"{API_BASE_URL}/analysis/{task_id}", timeout=15)
+        response = get_http_session().get(f"{API_BASE_URL}/analysis/{task_id}", params=params, timeout=API_TIMEOUT)
         response.raise_for_status()
         return response.json()  # Returns {"task_id": ..., "status": ..., "result": ...}
     except requests.exceptions.RequestException as e:
@@ -61,16 +158,30 @@ def get_analysis_status(task_id: str):
 st.set_page_config(page_title="Search & Analysis Agent", layout="wide")
 st.title("🔎 Internet Search & Sustainability Analysis Agent")
 
+if st.sidebar.button("Clear cache"):
+    get_query_response_cache().clear()
+
 # --- General Query Section ---
 st.header("General Query")
 query_input = st.text_input("Ask the agent anything:", key="query_input")
 if st.button("Submit Query", key="submit_query"):
     if query_input:
-        with st.spinner("Thinking..."):
-            agent_response = query_agent(query_input)
-            if agent_response:
-                st.markdown("**Agent Response:**")
-                st.markdown(agent_response)  # Use markdown for potential formatting
+        query_result = {}
+        cached_response = get_query_response_cache().get(query_input)
+        if cached_response is not None:
+            query_result["response"] = cached_response
+        else:
+            # The agent's reasoning is streamed into a collapsible box while it works; the answer is shown below it
+            with st.status("Thinking...") as thinking:
+                st.write_stream(stream_query_agent(query_input, query_result))
+                thinking.update(label="Done", state="complete", expanded=False)
+            if query_result.get("done"):
+                get_query_response_cache().set(query_input, query_result["response"])
+        if query_result.get("error"):
+            st.error(query_result["error"])
+        elif "response" in query_result:
+            st.markdown("**Agent Response:**")
+            st.markdown(query_result["response"])  # Use markdown for potential formatting
     else:
         st.warning("Please enter a query.")
 
@@ -91,6 +202,10 @@ if "submitted_industry" not in st.session_state:
     st.session_state.submitted_industry = None
 if "analysis_duration" not in st.session_state:
     st.session_state.analysis_duration = None
+if "poll_interval_seconds" not in st.session_state:
+    st.session_state.poll_interval_seconds = POLL_INITIAL_INTERVAL_SECONDS
+if "next_poll_at" not in st.session_state:
+    st.session_state.next_poll_at = 0.0
 
 
 if st.button("Start Analysis", key="start_analysis"):
@@ -100,49 +215,57 @@ if st.button("Start Analysis", key="start_analysis"):
         st.session_state.analysis_result = None
         st.session_state.analysis_duration = None
         st.session_state.submitted_industry = industry_input
+        st.session_state.poll_interval_seconds = POLL_INITIAL_INTERVAL_SECONDS
+        st.session_state.next_poll_at = 0.0
         with st.spinner(f"Submitting analysis request for '{industry_input}'..."):
             submit_response = submit_analysis_request(industry_input)
             if submit_response and "task_id" in submit_response:
                 st.session_state.analysis_task_id = submit_response["task_id"]
                 st.session_state.analysis_status = "PENDING"
                 st.success(f"Analysis task submitted successfully! Task ID: {st.session_state.analysis_task_id}")
-                st.info("Status will update below automatically (polling every 10s).")
+                st.info("Status will update below automatically.")
             else:
                 st.error("Failed to submit analysis task.")
                 st.session_state.submitted_industry = None  # Clear if submission failed
     else:
         st.warning("Please enter an industry name.")
 
-# Display analysis status and result (using polling)
-if st.session_state.analysis_task_id:
-    st.subheader(
-        f"Analysis Status for '{st.session_state.submitted_industry}' (Task ID: {st.session_state.analysis_task_id})"
-    )
+
+def render_analysis_status():
+    """Polls the analysis task status (with backoff) and renders it, along with the final result."""
     status_placeholder = st.empty()
 
-    # Basic polling loop
-    while st.session_state.analysis_status in ["PENDING", "RUNNING"]:
-        status_data = get_analysis_status(st.session_state.analysis_task_id)
+    if st.session_state.analysis_status in ACTIVE_TASK_STATUSES and time.monotonic() >= st.session_state.next_poll_at:
+        previous_status = st.session_state.analysis_status
+        status_data = get_analysis_status(st.session_state.analysis_task_id, last_status=previous_status)
         if status_data:
             st.session_state.analysis_status = status_data.get("status", "UNKNOWN")
             st.session_state.analysis_result = status_data.get("result")
             st.session_state.analysis_duration = status_data.get("duration_seconds")
-            status_placeholder.info(f"Status: {st.session_state.analysis_status}")
-            if st.session_state.analysis_status not in ["PENDING", "RUNNING"]:
-                break  # Exit loop if completed or failed
+        # Poll less often while nothing changes; go back to the initial interval on a status change
+        if status_data and st.session_state.analysis_status != previous_status:
+            st.session_state.poll_interval_seconds = POLL_INITIAL_INTERVAL_SECONDS
         else:
+            st.session_state.poll_interval_seconds = min(
+                st.session_state.poll_interval_seconds * POLL_BACKOFF_FACTOR, POLL_MAX_INTERVAL_SECONDS
+            )
+        st.session_state.next_poll_at = time.monotonic() + st.session_state.poll_interval_seconds
+        if st.session_state.analysis_status not in ACTIVE_TASK_STATUSES:
+            st.rerun()  # Full rerun so the section is rendered once more without the polling timer
+        if not status_data:
             status_placeholder.warning("Could not fetch status from API...")
-            # Optional: Add a longer delay or break after multiple fetch failures
-        time.sleep(10)  # Poll every 10 seconds
+            return
 
-    # Display final status and result with duration
+    # Display current status and result with duration
     duration_str = (
         f" (Duration: {st.session_state.analysis_duration} seconds)"
         if st.session_state.analysis_duration is not None
         else ""
     )
 
-    if st.session_state.analysis_status == "COMPLETED":
+    if st.session_state.analysis_status in ACTIVE_TASK_STATUSES:
+        status_placeholder.info(f"Status: {st.session_state.analysis_status}")
+    elif st.session_state.analysis_status == "COMPLETED":
         status_placeholder.success(f"Status: {st.session_state.analysis_status}{duration_str}")
         st.markdown("**Analysis Result:**")
         st.markdown(st.session_state.analysis_result)
@@ -150,8 +273,15 @@ if st.session_state.analysis_task_id:
         status_placeholder.error(f"Status: {st.session_state.analysis_status}{duration_str}")
         st.markdown("**Error Details:**")
         st.error(st.session_state.analysis_result)
-    elif st.session_state.analysis_status not in [
-        "PENDING",
-        "RUNNING",
-    ]:  # Handle UNKNOWN or other states
+    else:  # Handle UNKNOWN or other states
         status_placeholder.warning(f"Status: {st.session_state.analysis_status}{duration_str}")
+
+
+# Display analysis status and result. While the task is active, only this fragment reruns on a timer,
+# so the rest of the page stays interactive instead of being blocked by a polling loop.
+if st.session_state.analysis_task_id:
+    st.subheader(
+        f"Analysis Status for '{st.session_state.submitted_industry}' (Task ID: {st.session_state.analysis_task_id})"
+    )
+    polling = st.session_state.analysis_status in ACTIVE_TASK_STATUSES
+    st.fragment(render_analysis_status, run_every=POLL_TICK_SECONDS if polling else None)()
@@ -1,20 +1,31 @@
+import asyncio
+import hashlib
+import json
 import logging
 import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Annotated, Any, Dict, List, Optional, Union
 
-from fastapi import BackgroundTasks, FastAPI, HTTPException
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from langchain_core.messages import (
     AIMessage,
+    AIMessageChunk,
     BaseMessage,
     HumanMessage,
 )
 from logging_config import setup_logging  # Import the setup function
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from research_agent.database import (
+    find_active_task,
+    find_completed_task,
+    get_task,
     init_db,
     log_task_status,
 )
+from research_agent.llm_cache import get_llm_cache_stats
+from research_agent.ttl_cache import TTLCache
 
 # Ensure agent and graph are initialized before FastAPI starts
 # We might need to adjust agent.py/graph_builder.py slightly if they exit on error
@@ -36,10 +47,13 @@ setup_logging()
 
 # --- FastAPI App Setup ---
 app = FastAPI(
+    default_response_class=ORJSONResponse,  # orjson encodes message histories and results much faster than json
     title="Internet Search and Analysis Agent API",
     description="API for interacting with the ReAct agent and triggering sustainability report analysis.",
     version="1.0.0",
 )
+# Message histories and analysis results compress well; Server-Sent Events (/query/stream) are never compressed
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 try:
     unified_graph_app = build_unified_graph()
@@ -54,10 +68,18 @@ except Exception as e:
 
 init_db()
 
+# Answers to /query are reused for an identical query and message history (any change yields a different key)
+QUERY_CACHE_MAX_ENTRIES = 256
+QUERY_CACHE_TTL_SECONDS = 3600
+_query_response_cache = TTLCache(maxsize=QUERY_CACHE_MAX_ENTRIES, ttl_seconds=QUERY_CACHE_TTL_SECONDS)
+
 
 # --- Data Models (Pydantic) ---
 class QueryRequest(BaseModel):
-    query: str
+    # Whitespace is stripped before the length checks, so blank queries are rejected (422) before any LLM call
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    query: str = Field(..., min_length=1, max_length=4000)
     # Use Any for messages to simplify Pydantic validation, actual type is List[BaseMessage]
     # We'll convert dicts to BaseMessage objects before passing to the graph
     messages: Optional[List[Dict[str, Any]]] = Field(default_factory=list)
@@ -69,13 +91,16 @@ class QueryResponse(BaseModel):
 
 
 class AnalysisRequest(BaseModel):
-    industry: str
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    industry: str = Field(..., min_length=2, max_length=100)
+    force: bool = False  # Start a new task even if one for the same industry is in progress or recently completed
 
 
 class AnalysisTaskStatus(BaseModel):
     task_id: str
     status: str  # e.g., PENDING, RUNNING, COMPLETED, FAILED
-    result: Any = None
+    result: Optional[str] = None  # The synthesis result or error message, as stored in the task table
     start_time: Optional[datetime] = None
     duration_seconds: Optional[int] = None
 
@@ -86,18 +111,64 @@ class AnalysisSubmitResponse(BaseModel):
 
 
 # --- Background Task Management ---
-# Simple in-memory storage for task status and results
-# For production, use a more robust solution like Redis/Celery/DB
-analysis_tasks: Dict[str, AnalysisTaskStatus] = {}
+# Task status and results live in the SQLite task table (research_agent.database), not in process memory,
+# so any API worker process can answer /analysis/{task_id} for a task started by another one.
+
+ACTIVE_TASK_STATUSES = ("PENDING", "RUNNING")
+# Long-polling: /analysis/{task_id}?wait=N&last_status=S waits up to N seconds for the status to change.
+# Waiters are woken by status changes made in this process and re-read the database every
+# LONG_POLL_DB_CHECK_SECONDS to see changes made by other worker processes.
+LONG_POLL_MAX_WAIT_SECONDS = 30
+LONG_POLL_DB_CHECK_SECONDS = 1.0
+# Each task's event lives only while requests wait on it; the waiter count lets the last waiter drop it
+_task_status_events: Dict[str, asyncio.Event] = {}
+_task_status_waiters: Dict[str, int] = {}
+# A submission for an industry that already has an active task returns that task instead of starting another.
+# Tasks not updated for this long are treated as orphaned (e.g. by a restart) and no longer deduplicated against.
+ACTIVE_TASK_DEDUP_MAX_AGE_SECONDS = 2 * 3600
+# A finished analysis for the same industry is returned instead of rerunning it while it is this recent
+COMPLETED_TASK_REUSE_MAX_AGE_SECONDS = 6 * 3600
+_submission_lock = asyncio.Lock()  # Makes the check-then-create atomic within this process
+# In-process L1 for status polls: only finished tasks are cached, since their rows never change again, so
+# a poll storm on completed tasks skips SQLite while active tasks are always read fresh (from any worker).
+FINISHED_TASK_CACHE_MAX_ENTRIES = 1000
+FINISHED_TASK_CACHE_TTL_SECONDS = 3600
+_finished_task_cache = TTLCache(maxsize=FINISHED_TASK_CACHE_MAX_ENTRIES, ttl_seconds=FINISHED_TASK_CACHE_TTL_SECONDS)
+
+
+async def _load_task(task_id: str) -> Optional[Dict[str, Any]]:
+    """Returns a task's row, from the finished-task cache when possible, otherwise from the database."""
+    task = _finished_task_cache.get(task_id)
+    if task is None:
+        task = await asyncio.to_thread(get_task, task_id)
+        if task and task["status"] not in ACTIVE_TASK_STATUSES:
+            _finished_task_cache.set(task_id, task)
+    return task
+
+
+async def _set_task_status(task_id: str, **status_fields) -> None:
+    """Writes a task status to the database and wakes up any long-polling status requests for the task."""
+    await asyncio.to_thread(log_task_status, task_id=task_id, **status_fields)
+    event = _task_status_events.pop(task_id, None)
+    if event:
+        event.set()
+
+
+def _release_status_waiter(task_id: str) -> None:
+    """Unregisters a long-polling request; the task's event is dropped together with its last waiter."""
+    remaining = _task_status_waiters.pop(task_id) - 1
+    if remaining:
+        _task_status_waiters[task_id] = remaining
+    else:
+        _task_status_events.pop(task_id, None)
 
 
 async def run_analysis_background(task_id: str, industry: str):
     """Runs the LangGraph analysis in the background."""
     start_time = datetime.now()
     logging.info(f"Starting background analysis task {task_id} for industry: {industry} at {start_time.isoformat()}")
-    # Log initial RUNNING status to DB and update in-memory dict
-    analysis_tasks[task_id] = AnalysisTaskStatus(task_id=task_id, status="RUNNING", start_time=start_time)
-    log_task_status(task_id=task_id, industry=industry, status="RUNNING", start_time=start_time.isoformat())
+    # Log initial RUNNING status to DB
+    await _set_task_status(task_id, industry=industry, status="RUNNING", start_time=start_time.isoformat())
     try:
         inputs = {"industry": industry}
         final_state = await unified_graph_app.ainvoke(inputs)
@@ -115,12 +186,8 @@ async def run_analysis_background(task_id: str, industry: str):
         end_time = datetime.now()
         duration_seconds = int((end_time - start_time).total_seconds())
 
-        # Update in-memory status (for immediate checks via /analysis/{task_id})
-        analysis_tasks[task_id] = AnalysisTaskStatus(
-            task_id=task_id, status=status, result=result, start_time=start_time, duration_seconds=duration_seconds
-        )
-        log_task_status(
-            task_id=task_id,
+        await _set_task_status(
+            task_id,
             industry=industry,
             status=status,
             result_summary=str(result),
@@ -128,21 +195,15 @@ async def run_analysis_background(task_id: str, industry: str):
             duration_seconds=duration_seconds,
         )
         logging.info(f"Completed background analysis task {task_id}. Status: {status}, Duration: {duration_seconds}s")
+        logging.info(f"LLM cache stats: {get_llm_cache_stats()}")
 
     except Exception as e:
         end_time = datetime.now()
         duration_seconds = int((end_time - start_time).total_seconds())
         logging.error(f"Error in background analysis task {task_id}: {e}", exc_info=True)
         error_message = f"An unexpected error occurred: {e}"
-        analysis_tasks[task_id] = AnalysisTaskStatus(
-            task_id=task_id,
-            status="FAILED",
-            result=error_message,
-            start_time=start_time,
-            duration_seconds=duration_seconds,
-        )
-        log_task_status(
-            task_id=task_id,
+        await _set_task_status(
+            task_id,
             industry=industry,
             status="FAILED",
             result_summary=error_message,
@@ -154,22 +215,52 @@ async def run_analysis_background(task_id: str, industry: str):
 # --- API Endpoints ---
 
 
+# Conversation messages exchanged with clients, validated and serialized in one pass, dispatched on their "type"
+_MESSAGES_ADAPTER = TypeAdapter(List[Annotated[Union[HumanMessage, AIMessage], Field(discriminator="type")]])
+# Message types accepted in a query's history; other types are ignored
+_SUPPORTED_MESSAGE_TYPES = frozenset({"human", "ai"})
+
+
+def _accepted_history(request: QueryRequest) -> List[Dict[str, Any]]:
+    """Returns the request's history message dicts whose type is supported, in order."""
+    return [msg_data for msg_data in request.messages if msg_data.get("type") in _SUPPORTED_MESSAGE_TYPES]
+
+
+def _build_query_graph_input(history: List[Dict[str, Any]], query: str) -> Dict[str, Any]:
+    """Converts a query and its (accepted) message history dicts into the unified graph's input."""
+    previous_messages: List[BaseMessage] = _MESSAGES_ADAPTER.validate_python(history)
+    previous_messages.append(HumanMessage(content=query))
+    return {"input_query": query, "messages": previous_messages}
+
+
+def _serialize_conversation(history: List[Dict[str, Any]], final_messages: List[BaseMessage]) -> List[Dict[str, Any]]:
+    """Returns the conversation for the response: the client's history dicts as received, followed by the new
+    messages. The graph only appends to the history, so messages the client already has are not re-serialized."""
+    return history + _MESSAGES_ADAPTER.dump_python(final_messages[len(history) :], mode="json")
+
+
+def _query_cache_key(request: QueryRequest) -> str:
+    """Returns the response cache key for a query: a hash of the query and its full message history."""
+    payload = json.dumps([request.query, request.messages], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _sse_event(data: Dict[str, Any]) -> str:
+    """Formats a payload as a Server-Sent Events data message."""
+    return f"data: {json.dumps(data)}\n\n"
+
+
 @app.post("/query", response_model=QueryResponse)
 async def handle_query(request: QueryRequest):
     """Handles general queries using the unified graph."""
     logging.info(f"Received query: {request.query}, History length: {len(request.messages)}")
-
-    previous_messages: List[BaseMessage] = []
-    for msg_data in request.messages:
-        if msg_data.get("type") == "human":
-            previous_messages.append(HumanMessage(**msg_data))
-        elif msg_data.get("type") == "ai":
-            previous_messages.append(AIMessage(**msg_data))
-
-    graph_input = {
-        "input_query": request.query,
-        "messages": previous_messages + [HumanMessage(content=request.query)],
-    }
+    cache_key = _query_cache_key(request)
+    cached_response = _query_response_cache.get(cache_key)
+    if cached_response is not None:
+        logging.info("Query response cache hit.")
+        return QueryResponse(**cached_response)
+    history = _accepted_history(request)
+    graph_input = _build_query_graph_input(history, request.query)
 
     try:
         final_state = await unified_graph_app.ainvoke(graph_input)
@@ -182,9 +273,8 @@ async def handle_query(request: QueryRequest):
             )
 
         agent_response = final_state.get("agent_response", "Agent did not provide a final answer.")
-        updated_messages_lc = final_state.get("messages", [])
-
-        updated_messages_dict = [msg.dict() for msg in updated_messages_lc]
+        updated_messages_dict = _serialize_conversation(history, final_state.get("messages", []))
+        _query_response_cache.set(cache_key, {"response": agent_response, "messages": updated_messages_dict})
 
         return QueryResponse(response=agent_response, messages=updated_messages_dict)
 
@@ -193,25 +283,127 @@ async def handle_query(request: QueryRequest):
         raise HTTPException(status_code=500, detail=f"Error processing query: {e}")
 
 
+@app.post(
+    "/query/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events stream"}},
+)
+async def handle_query_stream(request: QueryRequest):
+    """Handles general queries like /query, but streams the agent's LLM tokens as Server-Sent Events.
+
+    Each token is sent as ``{"token": ...}``; the last event is either ``{"done": true, "response": ...,
+    "messages": [...]}`` or ``{"error": ...}``.
+    """
+    logging.info(f"Received streaming query: {request.query}, History length: {len(request.messages)}")
+    cache_key = _query_cache_key(request)
+    history = _accepted_history(request)
+    graph_input = _build_query_graph_input(history, request.query)
+
+    async def event_stream():
+        cached_response = _query_response_cache.get(cache_key)
+        if cached_response is not None:
+            logging.info("Query response cache hit.")
+            yield _sse_event({"done": True, **cached_response})
+            return
+        final_state: Dict[str, Any] = {}
+        try:
+            # "messages" surfaces LLM tokens as they are generated; "values" carries the full state after each step.
+            async for stream_mode, chunk in unified_graph_app.astream(graph_input, stream_mode=["messages", "values"]):
+                if stream_mode == "values":
+                    final_state = chunk
+                    continue
+                message_chunk, _ = chunk
+                if isinstance(message_chunk, AIMessageChunk) and isinstance(message_chunk.content, str):
+                    if message_chunk.content:
+                        yield _sse_event({"token": message_chunk.content})
+
+            if final_state.get("error_message"):
+                logging.error(f"Error processing streaming query via graph: {final_state['error_message']}")
+                yield _sse_event({"error": f"Error processing query: {final_state['error_message']}"})
+                return
+            agent_response = final_state.get("agent_response", "Agent did not provide a final answer.")
+            updated_messages_dict = _serialize_conversation(history, final_state.get("messages", []))
+            _query_response_cache.set(cache_key, {"response": agent_response, "messages": updated_messages_dict})
+            yield _sse_event({"done": True, "response": agent_response, "messages": updated_messages_dict})
+        except Exception as e:
+            logging.error(f"Error processing streaming query '{request.query}': {e}", exc_info=True)
+            yield _sse_event({"error": f"Error processing query: {e}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/analyze", response_model=AnalysisSubmitResponse)
 async def submit_analysis(request: AnalysisRequest, background_tasks: BackgroundTasks):
     """Submits a sustainability report analysis task to run in the background."""
     logging.info(f"Received analysis request for industry: {request.industry}")
-    task_id = str(uuid.uuid4())
-    analysis_tasks[task_id] = AnalysisTaskStatus(task_id=task_id, status="PENDING")
+    async with _submission_lock:
+        if not request.force:
+            existing_task_id = await asyncio.to_thread(
+                find_active_task, request.industry, ACTIVE_TASK_DEDUP_MAX_AGE_SECONDS
+            )
+            if existing_task_id:
+                logging.info(f"Analysis for industry '{request.industry}' already in progress: {existing_task_id}")
+                return AnalysisSubmitResponse(
+                    message="An analysis for this industry is already in progress.", task_id=existing_task_id
+                )
+            completed_task_id = await asyncio.to_thread(
+                find_completed_task, request.industry, COMPLETED_TASK_REUSE_MAX_AGE_SECONDS
+            )
+            if completed_task_id:
+                logging.info(f"Reusing recent analysis {completed_task_id} for industry '{request.industry}'")
+                return AnalysisSubmitResponse(
+                    message="A recent analysis for this industry is available.", task_id=completed_task_id
+                )
+        task_id = str(uuid.uuid4())
+        await _set_task_status(task_id, industry=request.industry, status="PENDING")
     background_tasks.add_task(run_analysis_background, task_id, request.industry)
     logging.info(f"Submitted analysis task {task_id} for industry: {request.industry}")
     return AnalysisSubmitResponse(message="Analysis task submitted.", task_id=task_id)
 
 
 @app.get("/analysis/{task_id}", response_model=AnalysisTaskStatus)
-async def get_analysis_status(task_id: str):
-    """Retrieves the status and result (if available) of an analysis task."""
+async def get_analysis_status(
+    task_id: str,
+    wait: float = Query(0, ge=0, description="Seconds to wait for the status to differ from last_status."),
+    last_status: Optional[str] = Query(None, description="The status the client already knows."),
+):
+    """Retrieves the status and result (if available) of an analysis task.
+
+    With ``wait`` and ``last_status``, the request is held (up to LONG_POLL_MAX_WAIT_SECONDS) while the task is
+    still active and its status equals ``last_status``, and returns as soon as it changes.
+    """
     logging.info(f"Checking status for analysis task: {task_id}")
-    task = analysis_tasks.get(task_id)
+    task = await _load_task(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Analysis task not found")
-    return task
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(wait, LONG_POLL_MAX_WAIT_SECONDS)
+    _task_status_waiters[task_id] = _task_status_waiters.get(task_id, 0) + 1
+    try:
+        while task["status"] == last_status and task["status"] in ACTIVE_TASK_STATUSES:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            event = _task_status_events.setdefault(task_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(remaining, LONG_POLL_DB_CHECK_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+            task = await _load_task(task_id) or task
+    finally:
+        _release_status_waiter(task_id)
+    return AnalysisTaskStatus(
+        task_id=task["task_id"],
+        status=task["status"],
+        result=task["result_summary"],
+        start_time=task["start_time"],
+        duration_seconds=task["duration_seconds"],
+    )
 
 
 @app.get("/")
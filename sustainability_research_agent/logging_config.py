@@ -2,9 +2,13 @@ import logging
 import os
 import sys
 
+from langchain_core.globals import set_debug
+
 DEFAULT_LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
+_configured = False
+
 
 def setup_logging():
     """
@@ -12,8 +16,17 @@ def setup_logging():
 
     Reads the desired log level from the LOG_LEVEL environment variable,
     defaulting to INFO. Configures the root logger and sets specific
-    levels for noisy libraries.
+    levels for noisy libraries. LangChain's debug tracing (every chain
+    input/output, including full tool results) is only enabled with LC_DEBUG=1.
+
+    Only the first call configures logging; later calls (e.g. from modules
+    re-imported by the reloader) are no-ops, so handlers are not rebuilt.
     """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
     log_level_name = os.environ.get("LOG_LEVEL", DEFAULT_LOG_LEVEL).upper()
     log_level = getattr(logging, log_level_name, logging.INFO)
 
@@ -27,7 +40,9 @@ def setup_logging():
     )
 
     # Set specific levels for noisy libraries
-    logging.getLogger("langchain").setLevel(logging.WARNING)
+    langchain_debug = os.environ.get("LC_DEBUG", "0") == "1"
+    set_debug(langchain_debug)
+    logging.getLogger("langchain").setLevel(logging.INFO if langchain_debug else logging.WARNING)
     logging.getLogger("pypdf").setLevel(logging.ERROR)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("httpx").setLevel(logging.WARNING)
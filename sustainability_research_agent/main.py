@@ -10,11 +10,16 @@ from research_agent.agent import (
     GEMINI_SUMMARY_MODEL,
 )
 from research_agent.graph_builder import (
+    SYNTHESIZE_TRENDS_NODE,
+    SYNTHESIZED_TRENDS_HEADER,
     build_unified_graph,
 )
+from research_agent.llm_cache import get_llm_cache_stats
 
 # Optional: Import os and shutil for cleanup if uncommented later
 
+_ANALYZE_RE = re.compile(r"analyze industry\s+(.+)")
+
 setup_logging()
 
 try:
@@ -37,16 +42,17 @@ async def main():
 
     while True:
         user_input = input("\nUser Query: ")
-        input_lower = user_input.strip().lower()
+        stripped_input = user_input.strip()
+        input_lower = stripped_input.lower()
 
         if input_lower in ["quit", "exit"]:
             print("Exiting agent.")
             break
-        if not user_input.strip():
+        if not stripped_input:
             continue
 
         inputs = {}
-        analysis_match = re.match(r"analyze industry\s+(.+)", input_lower)
+        analysis_match = _ANALYZE_RE.match(input_lower)
         if analysis_match:
             industry_name = analysis_match.group(1).strip()
             print(f"\n--- Starting Unified Graph (Analysis Path) for: {industry_name} ---")
@@ -59,7 +65,21 @@ async def main():
             }
 
         try:
-            final_state = await unified_graph_app.ainvoke(inputs, {"recursion_limit": 10})
+            final_state = None
+            streamed_synthesis = False
+            # "messages" surfaces LLM tokens as they are generated; "values" carries the full state after each step.
+            async for stream_mode, chunk in unified_graph_app.astream(
+                inputs, {"recursion_limit": 10}, stream_mode=["messages", "values"]
+            ):
+                if stream_mode == "values":
+                    final_state = chunk
+                    continue
+                message_chunk, metadata = chunk
+                if metadata.get("langgraph_node") == SYNTHESIZE_TRENDS_NODE and isinstance(message_chunk.content, str):
+                    if not streamed_synthesis:
+                        print(f"\n{SYNTHESIZED_TRENDS_HEADER}", end="")
+                        streamed_synthesis = True
+                    print(message_chunk.content, end="", flush=True)
 
             print("\n--- Graph Execution Complete ---")
 
@@ -71,12 +91,17 @@ async def main():
                 print(agent_response)
             elif final_state.get("synthesis_result"):
                 analysis_result = final_state["synthesis_result"]
+                if streamed_synthesis:
+                    # The trends were already printed token by token; only show the processed reports.
+                    analysis_result = analysis_result.split(SYNTHESIZED_TRENDS_HEADER)[0]
                 print("\nAnalysis Result:")
                 print(analysis_result)
             else:
                 print("\nGraph finished, but no standard output (agent_response/synthesis_result/error_message) found.")
                 print("Final State:", final_state)
 
+            logging.info(f"LLM cache stats: {get_llm_cache_stats()}")
+
         except Exception as e:
             logging.error(
                 f"Error invoking unified graph for input '{inputs}': {e}",
@@ -88,4 +113,10 @@ async def main():
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # Optional faster event loop (installed with uvicorn[standard]; not available on Windows)
+
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -1 +1,32 @@
-# This file makes the 'prompts' directory a Python package (though likely not needed for imports).
+import functools
+from pathlib import Path
+
+from langchain.prompts import PromptTemplate
+
+PROMPTS_DIR = Path(__file__).resolve().parent
+
+
+@functools.lru_cache(maxsize=None)
+def load_prompt_text(filename: str) -> str:
+    """Reads a prompt file from this directory, once per process.
+
+    Args:
+        filename: The prompt file name, e.g. "map_prompt.txt".
+
+    Returns:
+        The raw prompt text.
+    """
+    return (PROMPTS_DIR / filename).read_text()
+
+
+@functools.lru_cache(maxsize=None)
+def load_prompt_template(filename: str) -> PromptTemplate:
+    """Compiles a prompt file from this directory into a PromptTemplate, once per process.
+
+    Args:
+        filename: The prompt file name, e.g. "map_prompt.txt".
+
+    Returns:
+        The compiled PromptTemplate (shared between callers; do not mutate it).
+    """
+    return PromptTemplate.from_template(load_prompt_text(filename))
@@ -3,14 +3,80 @@ import os
 import sqlite3
 from typing import Any, Dict, List, Optional
 
+logger = logging.getLogger(__name__)
+
 # Define the path for the SQLite database file relative to this file
 DB_PATH = os.path.join(os.path.dirname(__file__), "analysis_history.db")
 
+# --- SQL statements (fixed strings, so each is parsed the same way on every call) ---
+# Upsert: every column takes the new values and the timestamp is refreshed, except that an existing start_time is
+# kept when the update does not provide one
+_UPSERT_TASK_SQL = """
+    INSERT INTO analysis_tasks
+    (task_id, industry, status, result_summary, start_time, duration_seconds, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(task_id) DO UPDATE SET
+        industry = excluded.industry,
+        status = excluded.status,
+        result_summary = excluded.result_summary,
+        start_time = COALESCE(excluded.start_time, analysis_tasks.start_time),
+        duration_seconds = excluded.duration_seconds,
+        timestamp = excluded.timestamp
+"""
+_GET_TASK_SQL = """
+    SELECT task_id, industry, status, result_summary, start_time, duration_seconds
+    FROM analysis_tasks
+    WHERE task_id = ?
+"""
+# Newest task for an industry (case-insensitive) in the given state, updated since datetime('now', <modifier>)
+_FIND_ACTIVE_TASK_SQL = """
+    SELECT task_id FROM analysis_tasks
+    WHERE status IN ('PENDING', 'RUNNING')
+      AND timestamp >= datetime('now', ?)
+      AND LOWER(industry) = LOWER(?)
+    ORDER BY timestamp DESC
+    LIMIT 1
+"""
+_FIND_COMPLETED_TASK_SQL = """
+    SELECT task_id FROM analysis_tasks
+    WHERE status = 'COMPLETED'
+      AND timestamp >= datetime('now', ?)
+      AND LOWER(industry) = LOWER(?)
+    ORDER BY timestamp DESC
+    LIMIT 1
+"""
+_QUERY_COMPLETED_TASKS_SQL = """
+    SELECT task_id, industry, status, result_summary, timestamp
+    FROM analysis_tasks
+    WHERE status = 'COMPLETED'
+    ORDER BY timestamp DESC LIMIT ?
+"""
+_QUERY_COMPLETED_TASKS_FOR_INDUSTRY_SQL = """
+    SELECT task_id, industry, status, result_summary, timestamp
+    FROM analysis_tasks
+    WHERE status = 'COMPLETED' AND LOWER(industry) = LOWER(?)
+    ORDER BY timestamp DESC LIMIT ?
+"""
+
+
+def _connect() -> sqlite3.Connection:
+    """Opens a connection to the task database.
+
+    synchronous=NORMAL is per connection. In WAL mode it keeps the database consistent while skipping the fsync on
+    every commit (only a power loss can drop the most recent status updates).
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
 
 def init_db():
     """Initializes the SQLite database and creates the analysis_tasks table if it doesn't exist."""
+    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
+        # WAL lets status reads proceed while a task's status is being written (the setting persists in the file)
+        conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS analysis_tasks (
@@ -28,9 +94,9 @@ def init_db():
             CREATE INDEX IF NOT EXISTS idx_status_timestamp ON analysis_tasks (status, timestamp);
         """)
         conn.commit()
-        logging.info(f"Database initialized successfully at {DB_PATH}")
+        logger.info(f"Database initialized successfully at {DB_PATH}")
     except sqlite3.Error as e:
-        logging.error(f"Database error during initialization: {e}", exc_info=True)
+        logger.error(f"Database error during initialization: {e}", exc_info=True)
     finally:
         if conn:
             conn.close()
@@ -47,74 +113,85 @@ def log_task_status(
     """Logs or updates the status, start time, and duration of an analysis task."""
     conn = None  # Ensure conn is defined before try block
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        # Use INSERT OR REPLACE. Update timestamp on replace.
-        # We need to handle potential NULLs for start_time and duration carefully.
-        # If the record exists, we might want to preserve the original start_time.
-        # Let's fetch first to preserve start_time if it exists.
-
-        cursor.execute("SELECT start_time FROM analysis_tasks WHERE task_id = ?", (task_id,))
-        existing_task = cursor.fetchone()
-        final_start_time = start_time
-        if existing_task and existing_task[0] and not start_time:
-            final_start_time = existing_task[0]  # Keep existing start_time if not provided in update
-
-        cursor.execute(
-            """
-            INSERT OR REPLACE INTO analysis_tasks
-            (task_id, industry, status, result_summary, start_time, duration_seconds, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """,
-            (
-                task_id,
-                industry,
-                status,
-                result_summary,
-                final_start_time,  # Use potentially preserved start_time
-                duration_seconds,
-            ),
-        )
+        conn = _connect()
+        conn.execute(_UPSERT_TASK_SQL, (task_id, industry, status, result_summary, start_time, duration_seconds))
         conn.commit()
-        logging.debug(
+        logger.debug(
             f"Logged status '{status}' for task {task_id} (Industry: {industry}, Duration: {duration_seconds}s)"
         )
     except sqlite3.Error as e:
-        logging.error(f"Database error logging task {task_id}: {e}", exc_info=True)
+        logger.error(f"Database error logging task {task_id}: {e}", exc_info=True)
+    finally:
+        if conn:
+            conn.close()
+
+
+def get_task(task_id: str) -> Optional[Dict[str, Any]]:
+    """Fetches a single analysis task by ID, or returns None if it does not exist (or on database error)."""
+    conn = None
+    try:
+        conn = _connect()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute(_GET_TASK_SQL, (task_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+    except sqlite3.Error as e:
+        logger.error(f"Database error fetching task {task_id}: {e}", exc_info=True)
+        return None
     finally:
         if conn:
             conn.close()
 
 
+def _find_recent_task(find_sql: str, industry: str, max_age_seconds: int) -> Optional[str]:
+    """Runs one of the _FIND_*_TASK_SQL statements: returns the ID of the newest matching task for the industry
+    updated within max_age_seconds, or None."""
+    conn = None
+    try:
+        conn = _connect()
+        row = conn.execute(find_sql, (f"-{max_age_seconds} seconds", industry)).fetchone()
+        return row[0] if row else None
+    except sqlite3.Error as e:
+        logger.error(f"Database error looking up recent task for industry '{industry}': {e}", exc_info=True)
+        return None
+    finally:
+        if conn:
+            conn.close()
+
+
+def find_active_task(industry: str, max_age_seconds: int) -> Optional[str]:
+    """Returns the ID of a PENDING/RUNNING task for the industry (case-insensitive) updated within max_age_seconds.
+
+    The age bound keeps tasks orphaned by a server restart from blocking new analyses forever.
+    """
+    return _find_recent_task(_FIND_ACTIVE_TASK_SQL, industry, max_age_seconds)
+
+
+def find_completed_task(industry: str, max_age_seconds: int) -> Optional[str]:
+    """Returns the ID of the newest COMPLETED task for the industry (case-insensitive) finished within
+    max_age_seconds, so a recent result can be reused instead of rerunning the analysis."""
+    return _find_recent_task(_FIND_COMPLETED_TASK_SQL, industry, max_age_seconds)
+
+
 def query_tasks(limit: int = 5, industry_filter: Optional[str] = None) -> List[Dict[str, Any]]:
     """Queries completed analysis tasks from the database."""
     conn = None
     results = []
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
         conn.row_factory = sqlite3.Row  # Return results as dict-like rows
         cursor = conn.cursor()
 
-        base_query = """
-            SELECT task_id, industry, status, result_summary, timestamp
-            FROM analysis_tasks
-            WHERE status = 'COMPLETED'
-        """
-        params = []
-
         if industry_filter:
-            base_query += " AND LOWER(industry) = LOWER(?)"
-            params.append(industry_filter)
-
-        base_query += " ORDER BY timestamp DESC LIMIT ?"
-        params.append(limit)
-
-        cursor.execute(base_query, params)
+            cursor.execute(_QUERY_COMPLETED_TASKS_FOR_INDUSTRY_SQL, (industry_filter, limit))
+        else:
+            cursor.execute(_QUERY_COMPLETED_TASKS_SQL, (limit,))
         results = [dict(row) for row in cursor.fetchall()]
-        logging.debug(f"Queried {len(results)} tasks (limit={limit}, industry='{industry_filter}')")
+        logger.debug(f"Queried {len(results)} tasks (limit={limit}, industry='{industry_filter}')")
 
     except sqlite3.Error as e:
-        logging.error(f"Database error querying tasks: {e}", exc_info=True)
+        logger.error(f"Database error querying tasks: {e}", exc_info=True)
         # Return empty list on error, or could raise an exception
     finally:
         if conn:
@@ -1,12 +1,22 @@
+import concurrent.futures
+import functools
 import hashlib  # For creating safe filenames from URLs
 import logging
+import multiprocessing
 import os
+import threading
 import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, List, Optional
 from urllib.parse import unquote, urlparse
 
+import pypdfium2 as pdfium
 import requests
 from langchain.tools import Tool
 from pypdf import PdfReader
+from requests.adapters import HTTPAdapter
+
+from research_agent.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +25,50 @@ logger = logging.getLogger(__name__)
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
 CACHE_DIR = os.path.join(PROJECT_ROOT, "pdf_cache")
 logger.info(f"PDF cache directory configured: {CACHE_DIR}")
+# Downloaded PDFs are hard-linked here under their content SHA256, so the same report served from several URLs
+# (mirrors, CDN variants) is stored once
+CONTENT_DIR_NAME = "by_content"
+# Extracted text is cached by the SHA256 of the PDF content, so re-analyses skip the (slow) pypdf parse
+TEXT_CACHE_DIR = os.path.join(PROJECT_ROOT, "text_cache")
+logger.info(f"Extracted text cache directory configured: {TEXT_CACHE_DIR}")
+# In-process L1 in front of the text cache: keyed by the PDF's path, mtime and size, so a hit needs no file reads
+# or hashing while a replaced file misses. Bounded by count; extracted reports are typically well under 1 MB each.
+EXTRACTED_TEXT_MEMORY_CACHE_ENTRIES = 32
+_extracted_text_memory_cache = TTLCache(maxsize=EXTRACTED_TEXT_MEMORY_CACHE_ENTRIES, ttl_seconds=None)
+
+DOWNLOAD_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"  # noqa: E501
+}
+HTTP_POOL_MAXSIZE = 16  # Matches the number of concurrent download workers with some headroom
+# 256 KiB chunks: a 100 MB report takes ~400 loop iterations and writes instead of ~12k at 8 KiB, while memory
+# held per concurrent download stays small
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+# The request timeout only bounds each socket read, so a server trickling bytes could stall a download indefinitely
+DOWNLOAD_DEADLINE_SECONDS = 300
+
+# Shared session so concurrent downloads reuse pooled keep-alive connections instead of a new TCP/TLS handshake each
+_http_session = requests.Session()
+_http_session.headers.update(DOWNLOAD_HEADERS)
+_http_adapter = HTTPAdapter(pool_connections=HTTP_POOL_MAXSIZE, pool_maxsize=HTTP_POOL_MAXSIZE)
+_http_session.mount("http://", _http_adapter)
+_http_session.mount("https://", _http_adapter)
+
+# PDFium (C++) extracts text far faster than pure-Python pypdf but is not thread-safe, so it only ever runs inside
+# the extraction worker processes. pypdf remains the fallback for PDFs PDFium rejects; being pure Python, large
+# PDFs are then parsed in page batches across the worker processes to use all cores.
+PDF_EXTRACTION_WORKERS = os.cpu_count() or 1
+PDF_PAGE_BATCH_SIZE = 10
+PARALLEL_EXTRACTION_MIN_PAGES = 10  # Smaller PDFs are parsed in-process; pool overhead would dominate
+# Workers must not be forked from the threaded server process (a lock held by another thread at fork time stays
+# locked forever in the child), so they start from a clean forkserver, or spawn where forkserver is unavailable.
+PDF_EXTRACTION_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+_pdf_extraction_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_pdf_extraction_pool_lock = threading.Lock()
 
 # --- Helper Functions ---
 
 
+@functools.lru_cache(maxsize=2048)
 def _is_valid_url(url: str) -> bool:
     """Checks if a string is a valid HTTP/HTTPS URL."""
     try:
@@ -28,10 +78,11 @@ def _is_valid_url(url: str) -> bool:
         return False
 
 
+@functools.lru_cache(maxsize=4096)  # Pure function of the URL; the same report URLs recur across graph runs
 def _url_to_filename(url: str) -> str:
     """Creates a safe filename from a URL, using a hash for uniqueness."""
-    # Use SHA256 hash of the URL to ensure uniqueness and avoid filesystem issues
-    url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    # Use SHA256 hash of the URL to ensure uniqueness and avoid filesystem issues (a name, not a security boundary)
+    url_hash = hashlib.sha256(url.encode("utf-8"), usedforsecurity=False).hexdigest()
     # Optionally, try to get a readable name from the URL path for easier debugging
     try:
         path = urlparse(url).path
@@ -54,6 +105,44 @@ def _url_to_filename(url: str) -> str:
     return f"{url_hash}.pdf"
 
 
+def _file_sha256(filepath: str) -> str:
+    """Computes the SHA256 hex digest of a file's content, reading it in blocks."""
+    file_hash = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def _download_tmp_filepath(local_filepath: str) -> str:
+    """Returns the temporary path a download is written to before being renamed to local_filepath.
+
+    The name is unique per process and thread, so concurrent downloads of the same URL do not share a file.
+    """
+    return f"{local_filepath}.{os.getpid()}.{threading.get_ident()}.part"
+
+
+def _share_identical_content(local_filepath: str, content_sha256: str, tmp_filepath: str) -> None:
+    """Makes a freshly downloaded PDF share storage with an identical, previously downloaded one.
+
+    If a file with the same content hash is already registered, local_filepath is atomically replaced by a hard
+    link to it; otherwise local_filepath is registered. Failures (e.g. no hard link support) only cost disk space.
+    """
+    content_filepath = os.path.join(CACHE_DIR, CONTENT_DIR_NAME, f"{content_sha256}.pdf")
+    try:
+        os.makedirs(os.path.dirname(content_filepath), exist_ok=True)
+        if not os.path.exists(content_filepath):
+            os.link(local_filepath, content_filepath)
+        elif not os.path.samefile(content_filepath, local_filepath):
+            os.link(content_filepath, tmp_filepath)
+            os.replace(tmp_filepath, local_filepath)
+            logger.info(f"Downloaded PDF {local_filepath} is identical to an earlier download; sharing its file.")
+    except FileExistsError:
+        pass  # Registered concurrently by another download of the same content
+    except OSError as e:
+        logger.warning(f"Could not deduplicate downloaded PDF {local_filepath}: {e}")
+
+
 # --- Core Functionality ---
 
 
@@ -85,20 +174,18 @@ def download_pdf(url: str) -> str:
         return local_filepath
 
     logger.info(f"Cache miss: Attempting to download PDF from: {url}")
+    # Download into a temporary file renamed into place when complete, so an interrupted download (crash, Ctrl-C)
+    # never leaves a truncated PDF at local_filepath that later calls would take as a cache hit
+    tmp_filepath = _download_tmp_filepath(local_filepath)
     MAX_DOWNLOAD_RETRIES = 3
     RETRY_DOWNLOAD_DELAY_SECONDS = 10
     DOWNLOAD_TIMEOUT_SECONDS = 60  # Increased timeout
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"  # noqa: E501
-    }
-
     for attempt in range(MAX_DOWNLOAD_RETRIES):
         try:
             logger.info(f"Download attempt {attempt + 1}/{MAX_DOWNLOAD_RETRIES} for URL: {url}")
-            response = requests.get(
-                url, stream=True, timeout=DOWNLOAD_TIMEOUT_SECONDS, headers=headers, allow_redirects=True
-            )
+            deadline = time.monotonic() + DOWNLOAD_DEADLINE_SECONDS
+            response = _http_session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT_SECONDS, allow_redirects=True)
             response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
 
             content_type = response.headers.get("content-type", "").lower()
@@ -111,9 +198,15 @@ def download_pdf(url: str) -> str:
                 )
                 # Decide whether to proceed or return error - proceeding for now
 
-            with open(local_filepath, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
+            content_hash = hashlib.sha256(usedforsecurity=False)  # Hashed as the bytes stream past
+            with response, open(tmp_filepath, "wb") as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if time.monotonic() > deadline:
+                        raise requests.exceptions.Timeout(f"Download exceeded {DOWNLOAD_DEADLINE_SECONDS} seconds")
                     f.write(chunk)
+                    content_hash.update(chunk)
+            os.replace(tmp_filepath, local_filepath)
+            _share_identical_content(local_filepath, content_hash.hexdigest(), tmp_filepath)
 
             logger.info(f"Successfully downloaded PDF to cache: {local_filepath}")
             return local_filepath  # Success
@@ -125,10 +218,10 @@ def download_pdf(url: str) -> str:
                 time.sleep(RETRY_DOWNLOAD_DELAY_SECONDS)
             else:
                 logger.error(f"All {MAX_DOWNLOAD_RETRIES} download attempts timed out for {url}.")
-                # Clean up potentially incomplete file on final error
-                if os.path.exists(local_filepath):
+                # Clean up the incomplete download on final error
+                if os.path.exists(tmp_filepath):
                     try:
-                        os.remove(local_filepath)
+                        os.remove(tmp_filepath)
                     except OSError:
                         pass
                 error_message = (
@@ -145,9 +238,9 @@ def download_pdf(url: str) -> str:
                 time.sleep(RETRY_DOWNLOAD_DELAY_SECONDS)
             else:
                 logger.error(f"All {MAX_DOWNLOAD_RETRIES} download attempts failed for {url}. Reason: {e}")
-                if os.path.exists(local_filepath):
+                if os.path.exists(tmp_filepath):
                     try:
-                        os.remove(local_filepath)
+                        os.remove(tmp_filepath)
                     except OSError:
                         pass
                 return f"Error: Failed to download PDF from {url} after {MAX_DOWNLOAD_RETRIES} attempts. Reason: {e}"
@@ -159,9 +252,9 @@ def download_pdf(url: str) -> str:
                 logger.info(f"Retrying download in {RETRY_DOWNLOAD_DELAY_SECONDS} seconds...")
                 time.sleep(RETRY_DOWNLOAD_DELAY_SECONDS)
             else:
-                if os.path.exists(local_filepath):
+                if os.path.exists(tmp_filepath):
                     try:
-                        os.remove(local_filepath)
+                        os.remove(tmp_filepath)
                     except OSError:
                         pass
                 error_message = (
@@ -175,30 +268,150 @@ def download_pdf(url: str) -> str:
     return f"Error: Failed to download PDF from {url} after {MAX_DOWNLOAD_RETRIES} attempts (unknown reason)."
 
 
-def extract_text_from_pdf(local_filepath: str) -> str:
-    """
-    Extracts text content from a local PDF file.
+def _get_pdf_extraction_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Returns the shared PDF extraction process pool, creating it on first use."""
+    global _pdf_extraction_pool
+    with _pdf_extraction_pool_lock:
+        if _pdf_extraction_pool is None:
+            _pdf_extraction_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=PDF_EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context(PDF_EXTRACTION_START_METHOD),
+            )
+            logger.info(f"Started PDF extraction process pool with {PDF_EXTRACTION_WORKERS} workers.")
+        return _pdf_extraction_pool
 
-    Args:
-        local_filepath: The path to the local PDF file.
 
-    Returns:
-        The extracted text content as a single string if successful,
-        otherwise an error message string.
-    """
-    logger.info(f"Attempting to extract text from PDF: {local_filepath}")
+def _discard_pdf_extraction_pool(pool: concurrent.futures.ProcessPoolExecutor) -> None:
+    """Drops a broken pool so the next extraction starts a fresh one."""
+    global _pdf_extraction_pool
+    with _pdf_extraction_pool_lock:
+        if _pdf_extraction_pool is pool:
+            _pdf_extraction_pool = None
+    pool.shutdown(wait=False)
+
+
+def warm_up_pdf_extraction_pool() -> None:
+    """Starts the PDF extraction worker processes ahead of the first large PDF, so it does not pay their startup."""
+    pool = _get_pdf_extraction_pool()
+    try:
+        for future in [pool.submit(os.getpid) for _ in range(PDF_EXTRACTION_WORKERS)]:
+            future.result()
+    except BrokenProcessPool:
+        _discard_pdf_extraction_pool(pool)
+        raise
+
+
+def _iter_page_texts(reader: PdfReader, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    """Yields the non-empty text of the reader's pages in [start, stop), in page order."""
+    for page in reader.pages[start:stop]:
+        page_text = page.extract_text()
+        if page_text:  # Check if text extraction returned something
+            yield page_text
+
+
+def _extract_page_range(local_filepath: str, start: int, stop: int) -> List[str]:
+    """Process pool worker: extracts the non-empty page texts of pages [start, stop) of a PDF."""
+    return list(_iter_page_texts(PdfReader(local_filepath), start, stop))
+
+
+def _extract_pages_with_pdfium(local_filepath: str) -> List[str]:
+    """Process pool worker: extracts the non-empty page texts of a PDF with PDFium."""
+    pdf = pdfium.PdfDocument(local_filepath)
+    try:
+        page_texts = []
+        for page_index in range(len(pdf)):
+            page = pdf[page_index]
+            text_page = page.get_textpage()
+            page_text = text_page.get_text_range().replace("\r\n", "\n")  # PDFium uses CRLF line breaks
+            text_page.close()
+            page.close()
+            if page_text.strip():
+                page_texts.append(page_text)
+        return page_texts
+    finally:
+        pdf.close()
+
+
+def _run_in_extraction_pool(fn, *args):
+    """Runs fn(*args) on the shared PDF extraction pool and returns its result."""
+    pool = _get_pdf_extraction_pool()
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        _discard_pdf_extraction_pool(pool)
+        raise
+
+
+def _extract_pages_in_pool(local_filepath: str, num_pages: int) -> List[str]:
+    """Extracts a PDF's page texts in batches of PDF_PAGE_BATCH_SIZE pages across the shared process pool."""
+    pool = _get_pdf_extraction_pool()
+    try:
+        futures = [
+            pool.submit(_extract_page_range, local_filepath, start, start + PDF_PAGE_BATCH_SIZE)
+            for start in range(0, num_pages, PDF_PAGE_BATCH_SIZE)
+        ]
+        # Results are collected in submission order, so pages stay in document order
+        return [page_text for future in futures for page_text in future.result()]
+    except BrokenProcessPool:
+        _discard_pdf_extraction_pool(pool)
+        raise
+
+
+def _check_pdf_path(local_filepath: str) -> Optional[str]:
+    """Returns an error message if the path is not an existing PDF file, otherwise None."""
     if not os.path.exists(local_filepath):
         return f"Error: PDF file not found at path: {local_filepath}"
     if not local_filepath.lower().endswith(".pdf"):
         return f"Error: File does not appear to be a PDF: {local_filepath}"
+    return None
+
+
+def _save_text_to_cache(text: str, text_cache_filepath: str) -> None:
+    """Writes extracted text to the text cache atomically.
 
+    The text is written to a temporary file and renamed into place, so an interrupted write never leaves a
+    truncated cache file that later lookups would treat as a hit.
+    """
+    tmp_filepath = f"{text_cache_filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
     try:
-        reader = PdfReader(local_filepath)
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:  # Check if text extraction returned something
-                text += page_text + "\n"  # Add newline between pages
+        os.makedirs(TEXT_CACHE_DIR, exist_ok=True)
+        with open(tmp_filepath, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_filepath, text_cache_filepath)
+        logger.info(f"Saved extracted text to cache: {text_cache_filepath}")
+    except OSError as e:
+        logger.warning(f"Failed to save extracted text to cache at {text_cache_filepath}: {e}")
+        try:
+            os.remove(tmp_filepath)
+        except OSError:
+            pass
+
+
+def _extract_page_texts_with_pypdf(local_filepath: str) -> Iterable[str]:
+    """Extracts a PDF's non-empty page texts with pypdf, in page batches across the pool for large files."""
+    reader = PdfReader(local_filepath)
+    num_pages = len(reader.pages)
+    if num_pages >= PARALLEL_EXTRACTION_MIN_PAGES:
+        try:
+            return _extract_pages_in_pool(local_filepath, num_pages)
+        except BrokenProcessPool as e:
+            logger.warning(f"PDF extraction pool is broken ({e}); extracting {local_filepath} in-process.")
+    return _iter_page_texts(reader)
+
+
+def _extract_and_cache_text(local_filepath: str, text_cache_filepath: Optional[str]) -> str:
+    """Parses a PDF's text (with PDFium, falling back to pypdf) and saves it to the text cache, if a path is given.
+
+    Returns the extracted text, or an error/warning message string.
+    """
+    try:
+        try:
+            page_texts = _run_in_extraction_pool(_extract_pages_with_pdfium, local_filepath)
+        except (pdfium.PdfiumError, BrokenProcessPool) as e:
+            logger.warning(f"PDFium could not extract {local_filepath} ({e}); falling back to pypdf.")
+            page_texts = _extract_page_texts_with_pypdf(local_filepath)
+        # Join once instead of growing one string page by page (quadratic copying on large reports)
+        text = "".join(f"{page_text}\n" for page_text in page_texts)
 
         if not text:
             logger.warning(
@@ -207,6 +420,8 @@ def extract_text_from_pdf(local_filepath: str) -> str:
             return f"Warning: No text could be extracted from PDF: {local_filepath}. File might be image-based."
 
         logger.info(f"Successfully extracted text from PDF: {local_filepath} (Length: {len(text)})")
+        if text_cache_filepath:
+            _save_text_to_cache(text, text_cache_filepath)
         return text
 
     except Exception as e:
@@ -214,6 +429,86 @@ def extract_text_from_pdf(local_filepath: str) -> str:
         return f"Error: Failed to extract text from PDF {local_filepath}. Reason: {e}"
 
 
+def extract_text_from_pdf(local_filepath: str) -> str:
+    """
+    Extracts text content from a local PDF file.
+
+    Args:
+        local_filepath: The path to the local PDF file.
+
+    Returns:
+        The extracted text content as a single string if successful,
+        otherwise an error message string.
+    """
+    logger.info(f"Attempting to extract text from PDF: {local_filepath}")
+    path_error = _check_pdf_path(local_filepath)
+    if path_error:
+        return path_error
+
+    try:
+        stat = os.stat(local_filepath)
+        memory_key = (os.path.abspath(local_filepath), stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        memory_key = None
+    if memory_key is not None:
+        text = _extracted_text_memory_cache.get(memory_key)
+        if text is not None:
+            logger.info(f"Cache hit: Extracted text for {local_filepath} found in memory")
+            return text
+
+    text = _load_or_extract_text(local_filepath)
+    if memory_key is not None and not (text.startswith("Error") or text.startswith("Warning")):
+        _extracted_text_memory_cache.set(memory_key, text)
+    return text
+
+
+def _load_or_extract_text(local_filepath: str) -> str:
+    """Returns a PDF's text from the text cache directory, extracting (and caching) it on a miss."""
+    text_cache_filepath = None
+    try:
+        text_cache_filepath = os.path.join(TEXT_CACHE_DIR, f"{_file_sha256(local_filepath)}.txt")
+        if os.path.exists(text_cache_filepath):
+            with open(text_cache_filepath, "r", encoding="utf-8") as f:
+                text = f.read()
+            logger.info(f"Cache hit: Loaded extracted text for {local_filepath} from {text_cache_filepath}")
+            return text
+    except OSError as e:
+        logger.warning(f"Could not read extracted text cache for {local_filepath}: {e}. Extracting again.")
+
+    return _extract_and_cache_text(local_filepath, text_cache_filepath)
+
+
+def extract_text_to_file(local_filepath: str) -> str:
+    """
+    Extracts text content from a local PDF file into the text cache without loading it for the caller.
+
+    Args:
+        local_filepath: The path to the local PDF file.
+
+    Returns:
+        The path of the cached text file if successful, otherwise an error or warning message string.
+    """
+    logger.info(f"Attempting to extract text from PDF to file: {local_filepath}")
+    path_error = _check_pdf_path(local_filepath)
+    if path_error:
+        return path_error
+
+    try:
+        text_cache_filepath = os.path.join(TEXT_CACHE_DIR, f"{_file_sha256(local_filepath)}.txt")
+    except OSError as e:
+        return f"Error: Could not read PDF file {local_filepath}: {e}"
+    if os.path.exists(text_cache_filepath):
+        logger.info(f"Cache hit: Extracted text for {local_filepath} is at {text_cache_filepath}")
+        return text_cache_filepath
+
+    text = _extract_and_cache_text(local_filepath, text_cache_filepath)
+    if text.startswith("Error") or text.startswith("Warning"):
+        return text
+    if not os.path.exists(text_cache_filepath):
+        return f"Error: Extracted text for {local_filepath} could not be saved to {text_cache_filepath}."
+    return text_cache_filepath
+
+
 # --- LangChain Tool Definitions ---
 
 download_pdf_tool = Tool(
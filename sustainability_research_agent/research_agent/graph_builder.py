@@ -1,23 +1,33 @@
+import asyncio
 import functools
+import io
 import logging
 import re
-import time
-from pathlib import Path
+import threading
 from typing import Dict, List, Optional
+from urllib.parse import urlparse
 
 from langchain.agents import AgentExecutor, create_react_agent
-from langchain.chains.summarize import load_summarize_chain
-from langchain.memory import ConversationBufferMemory
+from langchain.memory import ConversationBufferWindowMemory
 from langchain.prompts import PromptTemplate
 from langchain_core.chat_history import InMemoryChatMessageHistory
 from langchain_core.messages import AIMessage, HumanMessage
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langgraph.graph import END, MessagesState, StateGraph
+from prompts import load_prompt_template
+from pydantic import BaseModel, ConfigDict, Field
 
-from research_agent.agent import initialize_gemini, load_prompt
-from research_agent.file_tools import download_pdf_tool, extract_pdf_text_tool
+from research_agent.agent import REACT_MEMORY_WINDOW_TURNS, initialize_gemini, load_prompt
+from research_agent.file_tools import download_pdf_tool, extract_pdf_text_tool, warm_up_pdf_extraction_pool
 from research_agent.history_tools import query_analysis_history_tool
-from research_agent.research_tools import download_and_extract_reports, summarize_extracted_texts
-from research_agent.search_tool import search_langchain_tool
+from research_agent.research_tools import (
+    SUMMARY_CACHE_DIR,
+    MapReduceSummarizer,
+    download_and_summarize_reports,
+    prepare_summaries_for_synthesis,
+)
+from research_agent.search_tool import fetch_search_results, search_langchain_tool
+from research_agent.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
@@ -29,16 +39,26 @@ BASIC_AGENT_TOOLS = [
 ]
 
 # --- Configuration Constants ---
-CURRENT_FILE_DIR = Path(__file__).parent
-PROMPTS_DIR = CURRENT_FILE_DIR.parent / "prompts"
+COMPANY_ID_PROMPT_FILE = "company_identification_prompt.txt"
+SYNTHESIS_PROMPT_FILE = "synthesis_prompt.txt"
+MAP_PROMPT_FILE = "map_prompt.txt"
+COMBINE_PROMPT_FILE = "combine_prompt.txt"
 
-COMPANY_ID_PROMPT_FILE = PROMPTS_DIR / "company_identification_prompt.txt"
-SYNTHESIS_PROMPT_FILE = PROMPTS_DIR / "synthesis_prompt.txt"
-MAP_PROMPT_FILE = PROMPTS_DIR / "map_prompt.txt"
-COMBINE_PROMPT_FILE = PROMPTS_DIR / "combine_prompt.txt"
+# Embeddings used by the semantic summary cache (near-identical reports reuse an existing summary)
+SUMMARY_EMBEDDING_MODEL = "models/text-embedding-004"
+SEMANTIC_SUMMARY_CACHE_DIR = SUMMARY_CACHE_DIR / "semantic"
 
 MAX_SEARCH_RETRIES = 3
 RETRY_DELAY_SECONDS = 5
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+MIN_COMPANY_DOMAIN_TOKEN_CHARS = 4  # Shorter name words ("AG", "the") match too many unrelated domains
+MAX_CONCURRENT_SEARCHES = 5  # Bounds parallel searches to respect DuckDuckGo rate limits
+
+# --- Model Routing ---
+# Short queries with little history are answered by the faster summarizer (Flash) model;
+# anything longer is routed to the main (Pro) model.
+COMPLEX_QUERY_MIN_CHARS = 200
+COMPLEX_HISTORY_MIN_CHARS = 4000
 
 # --- Routing Constants ---
 ROUTE_RESEARCH_PATH = "research_path"
@@ -47,6 +67,32 @@ ROUTE_ERROR_INPUT = "error"
 ROUTE_CONTINUE = "continue"
 ROUTE_HANDLE_ERROR_STEP = "handle_error"
 
+# --- Node Names ---
+SYNTHESIZE_TRENDS_NODE = "synthesize_trends"
+SYNTHESIZED_TRENDS_HEADER = "--- Synthesized Trends ---\n"
+
+# Cross-company trends need at least two summaries; with fewer, the synthesis LLM call is skipped
+MIN_SUMMARIES_FOR_SYNTHESIS = 2
+
+
+class IdentifiedCompany(BaseModel):
+    """A company identified for an industry, with a web search query for its sustainability report."""
+
+    model_config = ConfigDict(extra="ignore")
+
+    name: str = Field(description="The company's name.")
+    search_query: str = Field(
+        description="A web search query likely to find the company's latest sustainability report as a PDF."
+    )
+
+
+class CompanyList(BaseModel):
+    """Structured output schema for the company identification step."""
+
+    model_config = ConfigDict(extra="ignore")
+
+    companies: List[IdentifiedCompany] = Field(description="The major companies operating in the industry.")
+
 
 class UnifiedGraphState(MessagesState):
     """Represents the state of our unified graph."""
@@ -57,8 +103,9 @@ class UnifiedGraphState(MessagesState):
     agent_response: Optional[str] = None
 
     companies: Optional[List[str]] = None
+    search_queries: Optional[Dict[str, str]] = None
     report_urls: Optional[Dict[str, str]] = None
-    extracted_texts: Optional[Dict[str, str]] = None
+    extracted_text_paths: Optional[Dict[str, str]] = None  # Paths to extracted text files, not the text itself
     individual_summaries: Optional[Dict[str, str]] = None
     synthesis_result: Optional[str] = None
     error_message: Optional[str] = None
@@ -87,28 +134,27 @@ def decide_route(state: UnifiedGraphState) -> str:
 
 
 # --- Extracted Node Functions ---
-def _identify_companies_node(state: UnifiedGraphState, llm, company_prompt_template_str: str) -> UnifiedGraphState:
-    """Identifies key companies for the given industry."""
+async def _identify_companies_node(
+    state: UnifiedGraphState, company_llm, company_prompt: PromptTemplate
+) -> UnifiedGraphState:
+    """Identifies key companies for the given industry, along with a report search query for each."""
     print("--- Node: identify_companies ---")
-    if state.get("error_message"):
-        return {}
     industry = state["industry"]
     logger.info(f"Identifying companies for industry: {industry}")
     try:
-        company_prompt = company_prompt_template_str.format(industry=industry)
-        company_response_message = llm.invoke(company_prompt)
-        company_response_content = company_response_message.content
-        companies = [name.strip() for name in company_response_content.split(",") if name.strip()]
-        if not companies:
-            logger.warning(
-                f"LLM did not identify companies for industry '{industry}'. Response: {company_response_content}"
-            )
+        company_list = await company_llm.ainvoke(company_prompt.format(industry=industry))
+        identified = [company for company in (company_list.companies if company_list else []) if company.name.strip()]
+        if not identified:
+            logger.warning(f"LLM did not identify companies for industry '{industry}'. Response: {company_list}")
             return {"error_message": f"Could not identify companies for industry '{industry}'."}
+        companies = [company.name.strip() for company in identified]
+        search_queries = {company.name.strip(): company.search_query.strip() for company in identified}
         logger.info(f"Identified companies: {companies}")
         return {
             "companies": companies,
+            "search_queries": search_queries,
             "report_urls": {},
-            "extracted_texts": {},
+            "extracted_text_paths": {},
             "individual_summaries": {},
         }
     except Exception as e:
@@ -116,24 +162,46 @@ def _identify_companies_node(state: UnifiedGraphState, llm, company_prompt_templ
         return {"error_message": f"Failed to identify companies: {e}"}
 
 
-def _run_basic_agent_node(state: UnifiedGraphState, react_agent, basic_agent_tools) -> UnifiedGraphState:
-    """Executes the basic ReAct agent for general queries."""
+def _is_complex_query(query: str, messages: list) -> bool:
+    """Returns True when the query or its conversation history warrants the main (Pro) model."""
+    history_chars = sum(len(str(msg.content)) for msg in messages)
+    return len(query) > COMPLEX_QUERY_MIN_CHARS or history_chars > COMPLEX_HISTORY_MIN_CHARS
+
+
+async def _run_basic_agent_node(
+    state: UnifiedGraphState, react_agent, fast_react_agent, basic_agent_tools
+) -> UnifiedGraphState:
+    """Executes the basic ReAct agent for general queries, using the fast model for simple ones."""
     print("--- Node: run_basic_agent ---")
     query = state["input_query"]
     messages = state.get("messages", [])
-    temp_memory = ConversationBufferMemory(
+    if _is_complex_query(query, messages):
+        logger.info("Routing query to the main ReAct agent.")
+        selected_agent = react_agent
+    else:
+        logger.info("Routing query to the fast ReAct agent.")
+        selected_agent = fast_react_agent
+    # The API sends the current query as the last history message; it is passed as the agent input instead
+    history = messages
+    new_messages = [HumanMessage(content=query)]
+    if history and isinstance(history[-1], HumanMessage) and history[-1].content == query:
+        history = history[:-1]
+        new_messages = []
+    temp_memory = ConversationBufferWindowMemory(
+        k=REACT_MEMORY_WINDOW_TURNS,
         memory_key="chat_history",
         return_messages=True,
         chat_memory=InMemoryChatMessageHistory(),
     )
-    for msg in messages:
+    # Only the turns inside the memory window can reach the prompt, so older ones are not loaded at all
+    for msg in history[-2 * REACT_MEMORY_WINDOW_TURNS :]:
         if isinstance(msg, HumanMessage):
             temp_memory.chat_memory.add_user_message(msg.content)
         elif isinstance(msg, AIMessage):
             temp_memory.chat_memory.add_ai_message(msg.content)
 
     react_agent_executor = AgentExecutor(
-        agent=react_agent,
+        agent=selected_agent,
         tools=basic_agent_tools,
         memory=temp_memory,
         verbose=False,
@@ -141,126 +209,143 @@ def _run_basic_agent_node(state: UnifiedGraphState, react_agent, basic_agent_too
     )
     logger.info(f"Running basic agent with query: {query}")
     try:
-        response = react_agent_executor.invoke({"input": query})
+        response = await react_agent_executor.ainvoke({"input": query})
         agent_response = response.get("output", "Agent did not provide a final answer.")
         logger.info(f"Basic agent response: {agent_response}")
-        updated_messages = temp_memory.chat_memory.messages
-        return {"messages": updated_messages, "agent_response": agent_response}
+        # Only the new turn is returned: the messages reducer appends it to the existing history
+        # (returning the rebuilt history would duplicate every earlier message)
+        return {"messages": new_messages + [AIMessage(content=agent_response)], "agent_response": agent_response}
     except Exception as e:
         logger.error(f"Error in run_basic_agent: {e}", exc_info=True)
         return {"error_message": f"Failed during basic agent execution: {e}"}
 
 
-def _search_for_reports_node(state: UnifiedGraphState) -> UnifiedGraphState:
-    """Searches for sustainability reports for each identified company with retries."""
+def _build_report_search_query(company: str, suggested_query: Optional[str]) -> str:
+    """Returns the search query for a company's report, preferring the one suggested during identification."""
+    search_query = suggested_query or f"{company} sustainability report"
+    if "filetype:pdf" not in search_query.lower():
+        search_query = f"{search_query} filetype:pdf"
+    return search_query
+
+
+def _company_domain_tokens(company: str) -> List[str]:
+    """Returns lowercase alphanumeric tokens of a company name that are expected in its own domain."""
+    words = [_NON_ALNUM_RE.sub("", word) for word in company.lower().split()]
+    tokens = ["".join(words)] + [word for word in words if len(word) >= MIN_COMPANY_DOMAIN_TOKEN_CHARS]
+    return [token for token in tokens if token]
+
+
+def _select_report_pdf_url(company: str, search_results: List[Dict[str, str]]) -> Optional[str]:
+    """Picks the most likely report PDF from structured search results, preferring the company's own domain."""
+    pdf_urls = [
+        result["href"]
+        for result in search_results
+        if result.get("href") and urlparse(result["href"]).path.lower().endswith(".pdf")
+    ]
+    if not pdf_urls:
+        return None
+    tokens = _company_domain_tokens(company)
+    for pdf_url in pdf_urls:
+        domain = urlparse(pdf_url).netloc.lower()
+        if any(token in domain for token in tokens):
+            return pdf_url
+    return pdf_urls[0]
+
+
+async def _search_company_report(company: str, search_query: str, semaphore: asyncio.Semaphore) -> Optional[str]:
+    """Searches for a single company's sustainability report PDF, retrying on failure."""
+    logger.info(f"Searching for report for: {company}")
+    logger.info(f"Using search query: {search_query}")
+
+    async with semaphore:
+        for attempt in range(MAX_SEARCH_RETRIES):
+            try:
+                # Retries query DuckDuckGo again: the cached results of the first attempt had no usable PDF link
+                search_results = await asyncio.to_thread(fetch_search_results, search_query, use_cache=attempt == 0)
+                pdf_url = _select_report_pdf_url(company, search_results)
+                if pdf_url:
+                    logger.info(f"Found potential PDF URL for {company}: {pdf_url}")
+                    return pdf_url
+                if attempt == MAX_SEARCH_RETRIES - 1:
+                    logger.warning(f"No direct PDF link found for {company} after {MAX_SEARCH_RETRIES} attempts.")
+            except Exception as e:
+                logger.warning(f"Search attempt {attempt + 1}/{MAX_SEARCH_RETRIES} for {company} failed: {e}")
+                if attempt < MAX_SEARCH_RETRIES - 1:
+                    logger.info(f"Retrying search for {company} in {RETRY_DELAY_SECONDS} seconds...")
+                    await asyncio.sleep(RETRY_DELAY_SECONDS)
+                else:
+                    logger.error(f"All {MAX_SEARCH_RETRIES} search attempts failed for {company}: {e}", exc_info=False)
+                    return f"Error during search for {company} after retries: {e}"
+    return None
+
+
+async def _search_for_reports_node(state: UnifiedGraphState) -> UnifiedGraphState:
+    """Searches for sustainability reports for all identified companies concurrently, with retries."""
     print("--- Node: search_for_reports ---")
-    if state.get("error_message"):
-        return {}
     companies = state["companies"]
+    search_queries = state.get("search_queries") or {}
     report_urls = state.get("report_urls", {})
     logger.info(f"Searching for reports for companies: {companies}")
 
+    pending_companies = []
     for company in companies:
         if company in report_urls and (
             report_urls[company] is None or (report_urls[company] and not str(report_urls[company]).startswith("Error"))
         ):
             logger.info(f"Report URL or null marker already present for {company}, skipping search.")
             continue
-
-        logger.info(f"Searching for report for: {company}")
-        search_query = f"{company} sustainability report filetype:pdf"
-        logger.info(f"Using search query: {search_query}")
-
-        for attempt in range(MAX_SEARCH_RETRIES):
-            try:
-                search_results_str = search_langchain_tool.run(search_query)
-                if "Error during DuckDuckGo search" in search_results_str or "Ratelimit" in search_results_str:
-                    raise Exception(f"Search tool returned an error: {search_results_str}")
-
-                pdf_links = re.findall(r"(https?://\S+\.pdf)", search_results_str, re.IGNORECASE)
-                if pdf_links:
-                    pdf_url = pdf_links[0]
-                    logger.info(f"Found potential PDF URL for {company}: {pdf_url}")
-                    report_urls[company] = pdf_url
-                    break
-                else:
-                    if attempt == MAX_SEARCH_RETRIES - 1:
-                        logger.warning(f"No direct PDF link found for {company} after {MAX_SEARCH_RETRIES} attempts.")
-                        report_urls[company] = None
-            except Exception as e:
-                logger.warning(f"Search attempt {attempt + 1}/{MAX_SEARCH_RETRIES} for {company} failed: {e}")
-                if attempt < MAX_SEARCH_RETRIES - 1:
-                    logger.info(f"Retrying search for {company} in {RETRY_DELAY_SECONDS} seconds...")
-                    time.sleep(RETRY_DELAY_SECONDS)
-                else:
-                    logger.error(f"All {MAX_SEARCH_RETRIES} search attempts failed for {company}: {e}", exc_info=False)
-                    report_urls[company] = f"Error during search for {company} after retries: {e}"
-                    break
-
-        if company not in report_urls:
-            report_urls[company] = None
+        pending_companies.append(company)
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+    results = await asyncio.gather(
+        *[
+            _search_company_report(company, _build_report_search_query(company, search_queries.get(company)), semaphore)
+            for company in pending_companies
+        ]
+    )
+    report_urls.update(zip(pending_companies, results))
 
     return {"report_urls": report_urls}
 
 
-def _download_and_extract_node(state: UnifiedGraphState) -> UnifiedGraphState:
-    """Node wrapper for downloading PDFs and extracting text using research_tools."""
-    print("--- Node: download_and_extract (using research_tools) ---")
-    if state.get("error_message"):
-        logger.warning("Skipping download_and_extract due to previous error.")
-        return {}
+async def _download_and_summarize_reports_node(
+    state: UnifiedGraphState, summarize_chain, semantic_cache: Optional[SemanticCache] = None
+) -> UnifiedGraphState:
+    """Node wrapper that downloads, extracts and summarizes the reports as one pipeline using research_tools."""
+    print("--- Node: download_and_summarize_reports (using research_tools) ---")
     report_urls = state.get("report_urls")
     if not report_urls:
-        logger.warning("No report URLs found in state for download_and_extract.")
-        return {"extracted_texts": {}}
+        logger.warning("No report URLs found in state for download_and_summarize_reports.")
+        return {"extracted_text_paths": {}, "individual_summaries": {}}
     try:
-        extracted_texts_results = download_and_extract_reports(report_urls)
+        extracted_text_paths, individual_summaries = await download_and_summarize_reports(
+            report_urls, summarize_chain, semantic_cache=semantic_cache
+        )
 
-        for company, text_or_error in extracted_texts_results.items():
-            if isinstance(text_or_error, str) and (
-                text_or_error.startswith("Error:") or text_or_error.startswith("Warning:")
+        for company, path_or_error in extracted_text_paths.items():
+            if isinstance(path_or_error, str) and (
+                path_or_error.startswith("Error:") or path_or_error.startswith("Warning:")
             ):
-                logger.warning(f"Download/extraction for {company} resulted in: {text_or_error}")
-
-        logger.info("Download and extraction process completed for all companies (some may have failed individually).")
-        return {"extracted_texts": extracted_texts_results}
+                logger.warning(f"Download/extraction for {company} resulted in: {path_or_error}")
 
+        logger.info(f"Download and summarize node finished. Returning summaries: {list(individual_summaries.keys())}")
+        return {"extracted_text_paths": extracted_text_paths, "individual_summaries": individual_summaries}
     except Exception as e:
-        logger.error(f"Critical unexpected error in download_and_extract node orchestration: {e}", exc_info=True)
-        error_texts = {
-            company: f"Critical error in download/extract node orchestration: {e}" for company in report_urls
-        }
-        return {"extracted_texts": error_texts}
-
-
-async def _summarize_reports_node(state: UnifiedGraphState, summarize_chain) -> UnifiedGraphState:
-    """Node wrapper for summarizing extracted text using research_tools."""
-    print("--- Node: summarize_reports (using research_tools) ---")
-    if state.get("error_message"):
-        logger.warning("Skipping summarize_reports due to previous error.")
-        return {}
-    extracted_texts = state.get("extracted_texts")
-    if not extracted_texts:
-        logger.warning("No extracted texts found in state for summarize_reports.")
-        return {"individual_summaries": {}}
-    try:
-        individual_summaries = await summarize_extracted_texts(extracted_texts, summarize_chain)
-        logger.info(f"Summarize node finished. Returning summaries: {list(individual_summaries.keys())}")
-        return {"individual_summaries": individual_summaries}
-    except Exception as e:
-        logger.error(f"Error calling summarize_extracted_texts: {e}", exc_info=True)
-        error_summaries = {company: f"Error in summarization step: {e}" for company in extracted_texts}
+        logger.error(f"Error calling download_and_summarize_reports: {e}", exc_info=True)
+        error_summaries = {company: f"Error in download/summarization step: {e}" for company in report_urls}
         return {
             "individual_summaries": error_summaries,
-            "error_message": f"Failed during summarization: {e}",
+            "error_message": f"Failed during download and summarization: {e}",
         }
 
 
-def _synthesize_trends_node(state: UnifiedGraphState, llm, synthesis_prompt_template_str: str) -> UnifiedGraphState:
-    """Synthesizes trends from the individual summaries."""
+async def _synthesize_trends_node(state: UnifiedGraphState, llm, synthesis_prompt: PromptTemplate) -> UnifiedGraphState:
+    """Synthesizes trends from the individual summaries.
+
+    The LLM is awaited with ``ainvoke`` so its tokens are surfaced to graph consumers using
+    ``stream_mode="messages"`` (e.g. the CLI) while still going through the LLM cache.
+    """
     print("--- Node: synthesize_trends ---")
-    if state.get("error_message"):
-        return {}
     industry = state["industry"]
     individual_summaries = state["individual_summaries"]
     report_urls = state["report_urls"]
@@ -272,25 +357,37 @@ def _synthesize_trends_node(state: UnifiedGraphState, llm, synthesis_prompt_temp
     if not valid_summaries:
         logger.warning("No valid summaries available for synthesis.")
         return {"error_message": "Analysis failed: No valid summaries could be generated."}
+    result_header = "Analysis based on reports processed for:\n"
+    report_section_buffer = io.StringIO()
+    for comp in valid_summaries:
+        report_section_buffer.write(f"- {comp}: {report_urls.get(comp, 'URL not found/processed')}\n")
+    report_section_buffer.write("\n")
+    report_section = report_section_buffer.getvalue()
+    if len(valid_summaries) < MIN_SUMMARIES_FOR_SYNTHESIS:
+        logger.info(f"Only {len(valid_summaries)} valid summary available; skipping the synthesis LLM call.")
+        company, summary = next(iter(valid_summaries.items()))
+        single_report_section = (
+            f"Only one company report could be summarized for the {industry} industry, "
+            "so no cross-company trends were synthesized.\n\n"
+            f"--- Summary for {company} ---\n{summary}"
+        )
+        return {"synthesis_result": result_header + report_section + single_report_section}
     logger.info("Synthesizing trends across summaries.")
-    combined_summaries = "\n\n".join(
-        [f"--- Summary for {company} ---\n{summary}" for company, summary in valid_summaries.items()]
-    )
+    synthesis_summaries = prepare_summaries_for_synthesis(valid_summaries)
+    # Appended into one buffer instead of building a list of formatted fragments and joining it
+    combined_buffer = io.StringIO()
+    for company, summary in synthesis_summaries.items():
+        if combined_buffer.tell():
+            combined_buffer.write("\n\n")
+        combined_buffer.write(f"--- Summary for {company} ---\n")
+        combined_buffer.write(summary)
+    combined_summaries = combined_buffer.getvalue()
     try:
-        synthesis_prompt = synthesis_prompt_template_str.format(
-            industry=industry, combined_summaries=combined_summaries
+        final_synthesis_message = await llm.ainvoke(
+            synthesis_prompt.format(industry=industry, combined_summaries=combined_summaries)
         )
-        final_synthesis_message = llm.invoke(synthesis_prompt)
         final_synthesis = final_synthesis_message.content
-        report_list = "\n".join(
-            [f"- {comp}: {report_urls.get(comp, 'URL not found/processed')}" for comp in valid_summaries.keys()]
-        )
-        if not report_list:
-            report_list = "No report URLs were successfully processed."
-        result_header = "Analysis based on reports processed for:\n"
-        report_section = f"{report_list}\n\n"
-        trends_header = "--- Synthesized Trends ---\n"
-        final_result = result_header + report_section + trends_header + final_synthesis
+        final_result = result_header + report_section + SYNTHESIZED_TRENDS_HEADER + final_synthesis
         logger.info("Finished synthesizing trends.")
         return {"synthesis_result": final_result}
     except Exception as e:
@@ -318,6 +415,17 @@ def _route_research_step_conditional_edge(state: UnifiedGraphState) -> str:
         return ROUTE_CONTINUE
 
 
+def _warm_up(semantic_cache: Optional[SemanticCache]) -> None:
+    """Starts the PDF extraction pool and loads the semantic cache index, so the first analysis finds them ready."""
+    try:
+        warm_up_pdf_extraction_pool()
+        if semantic_cache is not None:
+            semantic_cache.warm_up()
+        logger.info("Graph Builder: Warm-up completed.")
+    except Exception as e:
+        logger.warning(f"Graph Builder: Warm-up failed, components will start on first use: {e}")
+
+
 # --- Build the Unified Graph ---
 
 
@@ -328,55 +436,62 @@ def build_unified_graph():
         llm, llm_summarizer = initialize_gemini()
         react_prompt_template = load_prompt()
 
-        with open(MAP_PROMPT_FILE, "r") as f:
-            map_prompt_template = f.read()
-        map_prompt = PromptTemplate.from_template(map_prompt_template)
-        with open(COMBINE_PROMPT_FILE, "r") as f:
-            combine_prompt_template = f.read()
-        combine_prompt = PromptTemplate.from_template(combine_prompt_template)
-
-        with open(COMPANY_ID_PROMPT_FILE, "r") as f:
-            company_prompt_template_str = f.read()
-        with open(SYNTHESIS_PROMPT_FILE, "r") as f:
-            synthesis_prompt_template_str = f.read()
-
-        is_debug_enabled = logging.getLogger().getEffectiveLevel() <= logging.DEBUG
-        summarize_chain = load_summarize_chain(
-            llm=llm_summarizer,
-            chain_type="map_reduce",
-            map_prompt=map_prompt,
-            combine_prompt=combine_prompt,
-            verbose=is_debug_enabled,
-        )
-        logger.info(f"Graph Builder: Summarize chain initialized (verbose={is_debug_enabled}).")
+        map_prompt = load_prompt_template(MAP_PROMPT_FILE)
+        combine_prompt = load_prompt_template(COMBINE_PROMPT_FILE)
+        company_prompt = load_prompt_template(COMPANY_ID_PROMPT_FILE)
+        synthesis_prompt = load_prompt_template(SYNTHESIS_PROMPT_FILE)
+
+        summarize_chain = MapReduceSummarizer(llm_summarizer, map_prompt, combine_prompt)
+        logger.info("Graph Builder: Map-reduce summarizer initialized.")
+
+        company_llm = llm.with_structured_output(CompanyList)
+
+        try:
+            embeddings = GoogleGenerativeAIEmbeddings(model=SUMMARY_EMBEDDING_MODEL)
+            semantic_cache = SemanticCache(embeddings, SEMANTIC_SUMMARY_CACHE_DIR)
+            logger.info(f"Graph Builder: Semantic summary cache enabled at {SEMANTIC_SUMMARY_CACHE_DIR}.")
+        except Exception as e:
+            logger.warning(f"Graph Builder: Semantic summary cache disabled, embeddings unavailable: {e}")
+            semantic_cache = None
 
         react_agent = create_react_agent(llm, BASIC_AGENT_TOOLS, react_prompt_template)
-        logger.info("Graph Builder: ReAct agent initialized.")
+        fast_react_agent = create_react_agent(llm_summarizer, BASIC_AGENT_TOOLS, react_prompt_template)
+        logger.info("Graph Builder: ReAct agents (main and fast) initialized.")
 
     except Exception as e:
         logger.error(f"Graph Builder: Failed to initialize LLMs or chains: {e}", exc_info=True)
         raise RuntimeError(f"Failed to initialize graph components: {e}") from e
 
+    # Runs in the background so building the graph (and server/CLI startup) is not delayed
+    threading.Thread(target=_warm_up, args=(semantic_cache,), name="graph-warm-up", daemon=True).start()
+
     workflow = StateGraph(UnifiedGraphState)
 
     workflow.add_node("route_request", route_request)
     workflow.add_node(
         "run_basic_agent",
-        functools.partial(_run_basic_agent_node, react_agent=react_agent, basic_agent_tools=BASIC_AGENT_TOOLS),
+        functools.partial(
+            _run_basic_agent_node,
+            react_agent=react_agent,
+            fast_react_agent=fast_react_agent,
+            basic_agent_tools=BASIC_AGENT_TOOLS,
+        ),
     )
     workflow.add_node(
         "identify_companies",
-        functools.partial(_identify_companies_node, llm=llm, company_prompt_template_str=company_prompt_template_str),
+        functools.partial(_identify_companies_node, company_llm=company_llm, company_prompt=company_prompt),
     )
     workflow.add_node("search_for_reports", _search_for_reports_node)
-    workflow.add_node("download_and_extract", _download_and_extract_node)
-    workflow.add_node("summarize_reports", functools.partial(_summarize_reports_node, summarize_chain=summarize_chain))
     workflow.add_node(
-        "synthesize_trends",
+        "download_and_summarize_reports",
         functools.partial(
-            _synthesize_trends_node, llm=llm, synthesis_prompt_template_str=synthesis_prompt_template_str
+            _download_and_summarize_reports_node, summarize_chain=summarize_chain, semantic_cache=semantic_cache
         ),
     )
+    workflow.add_node(
+        SYNTHESIZE_TRENDS_NODE,
+        functools.partial(_synthesize_trends_node, llm=llm, synthesis_prompt=synthesis_prompt),
+    )
     workflow.add_node("handle_error", _handle_error_node)
 
     workflow.set_entry_point("route_request")
@@ -399,20 +514,15 @@ def build_unified_graph():
     workflow.add_conditional_edges(
         "search_for_reports",
         _route_research_step_conditional_edge,
-        {ROUTE_CONTINUE: "download_and_extract", ROUTE_HANDLE_ERROR_STEP: "handle_error"},
-    )
-    workflow.add_conditional_edges(
-        "download_and_extract",
-        _route_research_step_conditional_edge,
-        {ROUTE_CONTINUE: "summarize_reports", ROUTE_HANDLE_ERROR_STEP: "handle_error"},
+        {ROUTE_CONTINUE: "download_and_summarize_reports", ROUTE_HANDLE_ERROR_STEP: "handle_error"},
     )
     workflow.add_conditional_edges(
-        "summarize_reports",
+        "download_and_summarize_reports",
         _route_research_step_conditional_edge,
-        {ROUTE_CONTINUE: "synthesize_trends", ROUTE_HANDLE_ERROR_STEP: "handle_error"},
+        {ROUTE_CONTINUE: SYNTHESIZE_TRENDS_NODE, ROUTE_HANDLE_ERROR_STEP: "handle_error"},
     )
     workflow.add_conditional_edges(
-        "synthesize_trends",
+        SYNTHESIZE_TRENDS_NODE,
         _route_research_step_conditional_edge,
         {ROUTE_CONTINUE: END, ROUTE_HANDLE_ERROR_STEP: "handle_error"},
     )
@@ -421,5 +531,5 @@ def build_unified_graph():
     workflow.add_edge("handle_error", END)
 
     app = workflow.compile()
-    logging.info("Unified LangGraph workflow compiled.")
+    logger.info("Unified LangGraph workflow compiled.")
     return app
@@ -0,0 +1,55 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from langchain_community.cache import SQLiteCache
+from langchain_core.caches import RETURN_VAL_TYPE
+from langchain_core.globals import get_llm_cache, set_llm_cache
+
+logger = logging.getLogger(__name__)
+
+# Identical (model, prompt, params) calls are answered from this SQLite cache instead of the Gemini API
+LLM_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "llm_cache")
+LLM_CACHE_DB_PATH = os.path.join(LLM_CACHE_DIR, "llm_cache.db")
+
+
+class InstrumentedSQLiteCache(SQLiteCache):
+    """LangChain SQLiteCache that counts cache hits and misses for observability."""
+
+    def __init__(self, database_path: str = LLM_CACHE_DB_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(database_path)), exist_ok=True)
+        super().__init__(database_path=database_path)
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        result = super().lookup(prompt, llm_string)
+        with self._stats_lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of cache hits and misses since the cache was created."""
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def configure_llm_cache(database_path: str = LLM_CACHE_DB_PATH) -> InstrumentedSQLiteCache:
+    """Installs an instrumented SQLite cache as LangChain's global LLM cache and returns it."""
+    cache = InstrumentedSQLiteCache(database_path=database_path)
+    set_llm_cache(cache)
+    logger.info(f"LLM response cache enabled at {database_path}")
+    return cache
+
+
+def get_llm_cache_stats() -> Dict[str, int]:
+    """Returns the hit/miss counters of the global LLM cache (zeros if it is not instrumented)."""
+    cache = get_llm_cache()
+    if isinstance(cache, InstrumentedSQLiteCache):
+        return cache.stats()
+    return {"hits": 0, "misses": 0}
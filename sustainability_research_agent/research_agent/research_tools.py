@@ -1,27 +1,115 @@
 import asyncio
 import concurrent.futures
+import hashlib
 import logging
+import os
+import re
 import time
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import PromptTemplate
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-from research_agent.file_tools import download_pdf_tool, extract_pdf_text_tool
+from research_agent.file_tools import download_pdf_tool, extract_text_to_file
+from research_agent.semantic_cache import SemanticCache
+from research_agent.summary_store import get_cached_summary, save_summary
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
 CURRENT_FILE_PATH = Path(__file__).resolve()
 PROJECT_ROOT = CURRENT_FILE_PATH.parent.parent
 SUMMARY_CACHE_DIR = PROJECT_ROOT / "summary_cache"
+SUMMARY_DB_FILENAME = "summaries.db"
 logger.info(f"Research Tools: Summary cache directory configured: {SUMMARY_CACHE_DIR}")
 
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=8000, chunk_overlap=400)
-logger.info("Research Tools: Initialized text splitter with chunk_size=8000, chunk_overlap=400.")
+# Synthesis context budget: ~4 characters per token, so ~1500 tokens per company summary
+MAX_SUMMARY_CHARS_FOR_SYNTHESIS = 6000
+# Lines shorter than this (headings, bullets like "Emissions:") are kept even when repeated across summaries
+MIN_DEDUP_LINE_CHARS = 40
+
+# Large chunks keep the number of map-step LLM calls per report low; Flash comfortably handles this input size
+SUMMARY_CHUNK_SIZE = 12000
+SUMMARY_CHUNK_OVERLAP = 400
+
+text_splitter = RecursiveCharacterTextSplitter(chunk_size=SUMMARY_CHUNK_SIZE, chunk_overlap=SUMMARY_CHUNK_OVERLAP)
+logger.info(
+    f"Research Tools: Initialized text splitter with chunk_size={SUMMARY_CHUNK_SIZE}, "
+    f"chunk_overlap={SUMMARY_CHUNK_OVERLAP}."
+)
+
+
+# Report downloads/extractions block a thread for up to minutes each, so they get their own bounded pool instead of
+# the event loop's default executor, which also runs the ReAct agent's tool calls for interactive queries
+REPORT_DOWNLOAD_WORKERS = 10
+_report_download_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=REPORT_DOWNLOAD_WORKERS, thread_name_prefix="report-download"
+)
+
+# Upper bound on concurrent map-step LLM calls for a single report
+SUMMARY_MAP_MAX_CONCURRENCY = 16
+# Maximum partial summaries combined in one LLM call; very long reports are reduced hierarchically in groups
+SUMMARY_COMBINE_GROUP_SIZE = 16
+
+
+class MapReduceSummarizer:
+    """Map-reduce summarizer: summarizes every chunk concurrently, then combines the partial summaries.
+
+    The strategy adapts to the report size: a report that fits in one chunk is summarized with a single call
+    (no combine step), and when there are more partial summaries than ``combine_group_size`` they are combined
+    in groups, level by level, until one summary remains.
+
+    A drop-in replacement for LangChain's map_reduce summarize chain: ``ainvoke`` takes ``{"input_documents": docs}``
+    and returns ``{"output_text": ..., "intermediate_steps": [...]}``. Both prompts take a single ``{text}`` variable.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        map_prompt: PromptTemplate,
+        combine_prompt: PromptTemplate,
+        max_concurrency: int = SUMMARY_MAP_MAX_CONCURRENCY,
+        combine_group_size: int = SUMMARY_COMBINE_GROUP_SIZE,
+    ):
+        self.llm = llm
+        self.map_prompt = map_prompt
+        self.combine_prompt = combine_prompt
+        self.max_concurrency = max_concurrency
+        self.combine_group_size = combine_group_size
+
+    async def ainvoke(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        docs: List[Document] = inputs["input_documents"]
+        config = {"max_concurrency": self.max_concurrency}
+        map_prompts = [self.map_prompt.format(text=doc.page_content) for doc in docs]
+        mapped_messages = await self.llm.abatch(map_prompts, config=config)
+        partial_summaries = [message.content for message in mapped_messages]
+
+        summaries = partial_summaries
+        while len(summaries) > 1:
+            groups = [
+                summaries[i : i + self.combine_group_size] for i in range(0, len(summaries), self.combine_group_size)
+            ]
+            combine_prompts = [self.combine_prompt.format(text="\n\n".join(group)) for group in groups]
+            combined_messages = await self.llm.abatch(combine_prompts, config=config)
+            summaries = [message.content for message in combined_messages]
+        output_text = summaries[0] if summaries else ""
+        return {"output_text": output_text, "intermediate_steps": partial_summaries}
+
+
+def _summary_cache_key(text: str) -> str:
+    """Returns the summary store key for a report: the SHA256 of its full extracted text (content-addressed)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
 def _process_single_report_download_extract(company: str, url: str) -> Tuple[str, str]:
-    """Helper function to download and extract text for a single report URL."""
+    """Helper function to download and extract text for a single report URL.
+
+    Returns the company and the path of its extracted text file, or an error message.
+    """
     if url is None or url.startswith("Error"):
         logger.warning(f"Research Tools: Skipping download/extraction for {company} due to missing/error URL: {url}")
         return company, "No valid URL found."
@@ -33,55 +121,31 @@ def _process_single_report_download_extract(company: str, url: str) -> Tuple[str
             logger.error(f"Research Tools: Download failed for {company}: {local_path}")
             return company, f"Download failed: {local_path}"
 
-        extracted_text = extract_pdf_text_tool.run(local_path)
-        if extracted_text.startswith("Error") or extracted_text.startswith("Warning"):
-            logger.warning(f"Research Tools: Text extraction failed/empty for {company}: {extracted_text}")
-            return company, extracted_text
+        text_path = extract_text_to_file(local_path)  # Large PDFs are parsed across the page pool
+        if text_path.startswith("Error") or text_path.startswith("Warning"):
+            logger.warning(f"Research Tools: Text extraction failed/empty for {company}: {text_path}")
+            return company, text_path
         else:
-            logger.info(f"Research Tools: Successfully extracted text for {company} (length: {len(extracted_text)}).")
-            return company, extracted_text
+            logger.info(f"Research Tools: Successfully extracted text for {company} to {text_path}.")
+            return company, text_path
     except Exception as e:
         logger.error(f"Research Tools: Error during download/extraction for {company}: {e}", exc_info=True)
         return company, f"Error during download/extraction: {e}"
 
 
-def download_and_extract_reports(report_urls: Dict[str, str]) -> Dict[str, str]:
-    """Downloads PDFs from URLs and extracts text in parallel.
-
-    Args:
-        report_urls: A dictionary mapping company names to report PDF URLs.
-
-    Returns:
-        A dictionary mapping company names to extracted text or error messages.
-    """
-    extracted_texts: Dict[str, str] = {}
-    futures_map = {}
-    logger.info("Research Tools: Starting parallel download and extraction of PDFs.")
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        for company, url in report_urls.items():
-            future = executor.submit(_process_single_report_download_extract, company, url)
-            futures_map[future] = company
-
-        for future in concurrent.futures.as_completed(futures_map):
-            company_name = futures_map[future]
-            try:
-                _, result = future.result()
-                extracted_texts[company_name] = result
-                logger.info(f"Research Tools: Download/Extract completed for {company_name}.")
-            except Exception as e:
-                logger.error(
-                    f"Research Tools: Exception retrieving result for {company_name} in download/extract: {e}",
-                    exc_info=True,
-                )
-                extracted_texts[company_name] = f"Error retrieving download/extract result: {e}"
+def _load_extracted_text(text_path_or_error: str) -> str:
+    """Reads an extracted text file; error messages from the download/extract step are passed through."""
+    if not os.path.isfile(text_path_or_error):
+        return text_path_or_error
+    with open(text_path_or_error, "r", encoding="utf-8") as f:
+        return f.read()
 
-    logger.info("Research Tools: Finished parallel download and extraction.")
-    return extracted_texts
 
-
-async def _process_single_summary(company: str, text: str, summarize_chain) -> Tuple[str, str]:
-    """Helper function to summarize text for a single company, using cache."""
+async def _process_single_summary(
+    company: str, text: str, summarize_chain, semantic_cache: Optional[SemanticCache] = None
+) -> Tuple[str, str]:
+    """Helper function to summarize text for a single company, using the summary store and, if given,
+    the semantic cache (which also hits for near-identical reports of the same company, e.g. a re-download)."""
     if (
         text is None
         or text.startswith("Error")
@@ -92,23 +156,18 @@ async def _process_single_summary(company: str, text: str, summarize_chain) -> T
         logger.warning(f"Research Tools: Skipping summarization for {company} due to previous error or empty text.")
         return company, "Skipped due to previous error or empty text."
 
-    cache_filename = f"{company.replace(' ', '_').lower()}_summary.txt"
-    cache_filepath = SUMMARY_CACHE_DIR / cache_filename
-
-    SUMMARY_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-
-    if cache_filepath.exists():
-        logger.info(f"Research Tools: Cache hit for {company} summary: Loading from {cache_filepath}")
-        try:
-            with open(cache_filepath, "r") as f:
-                summary = f.read()
-            return company, summary
-        except Exception as e:
-            log_message = (
-                f"Research Tools: Failed to read cached summary for {company} "
-                f"from {cache_filepath}: {e}. Will regenerate."
-            )
-            logger.warning(log_message)
+    summary_db_path = SUMMARY_CACHE_DIR / SUMMARY_DB_FILENAME
+    cache_key = _summary_cache_key(text)
+    cached_summary = await asyncio.to_thread(get_cached_summary, summary_db_path, cache_key)
+    if cached_summary is not None:
+        logger.info(f"Research Tools: Cache hit for {company} summary in {summary_db_path}")
+        return company, cached_summary
+
+    if semantic_cache is not None:
+        cached_summary = await semantic_cache.alookup(text, label=company)
+        if cached_summary:
+            logger.info(f"Research Tools: Semantic cache hit for {company} summary.")
+            return company, cached_summary
 
     logger.info(f"Research Tools: Cache miss for {company}. Generating summary...")
     try:
@@ -139,12 +198,10 @@ async def _process_single_summary(company: str, text: str, summarize_chain) -> T
             logger.warning(f"Research Tools: Summarization for {company} resulted in empty output.")
             return company, "Error: Summarization resulted in empty output."
 
-        try:
-            with open(cache_filepath, "w") as f:
-                f.write(summary)
-            logger.info(f"Research Tools: Saved summary for {company} to cache: {cache_filepath}")
-        except Exception as e:
-            logger.error(f"Research Tools: Failed to save summary to cache for {company} at {cache_filepath}: {e}")
+        await asyncio.to_thread(save_summary, summary_db_path, cache_key, company, summary)
+        logger.info(f"Research Tools: Saved summary for {company} to cache: {summary_db_path}")
+        if semantic_cache is not None:
+            await semantic_cache.aupdate(text, summary, label=company)
         return company, summary
 
     except Exception as e:
@@ -152,45 +209,120 @@ async def _process_single_summary(company: str, text: str, summarize_chain) -> T
         return company, f"Error during summarization: {e}"
 
 
-async def summarize_extracted_texts(
-    extracted_texts: Dict[str, str], summarize_chain, max_workers: int = 10
-) -> Dict[str, str]:
-    """Summarizes the extracted text for each report in parallel, using a cache.
+async def download_and_summarize_reports(
+    report_urls: Dict[str, str],
+    summarize_chain,
+    max_workers: int = 10,
+    semantic_cache: Optional[SemanticCache] = None,
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Downloads, extracts and summarizes each report as a pipeline, using the download and summary caches.
+
+    Download/extraction workers feed a queue; each extracted text file is handed to summarization as soon as
+    it is ready, so the summarizer LLM is kept busy while later reports are still downloading. Only file paths
+    are passed around; a report's text is loaded just for its own summarization.
 
     Args:
-        extracted_texts: A dictionary mapping company names to extracted text.
+        report_urls: A dictionary mapping company names to report PDF URLs.
         summarize_chain: The pre-configured LangChain summarization chain instance.
-        max_workers: The maximum number of parallel workers for summarization.
+        max_workers: The maximum number of downloads, and separately of summarization chains, in flight.
+        semantic_cache: Optional embedding-similarity cache consulted before running the summarize chain.
 
     Returns:
-        A dictionary mapping company names to summaries or error messages.
+        A tuple of two dictionaries mapping company names to, respectively, the extracted text file path and
+        the summary (or error messages).
     """
     if summarize_chain is None:
         logger.error("Research Tools: Summarize chain was not provided. Cannot summarize.")
-        return {company: "Error: Summarization chain not provided." for company in extracted_texts}
+        return {}, {company: "Error: Summarization chain not provided." for company in report_urls}
 
-    individual_summaries: Dict[str, str] = {}
-    logger.info("Research Tools: Starting concurrent summarization.")
+    logger.info("Research Tools: Starting pipelined download, extraction and summarization.")
+    extracted_queue: asyncio.Queue = asyncio.Queue()
+    download_semaphore = asyncio.Semaphore(max_workers)
+    summary_semaphore = asyncio.Semaphore(max_workers)
 
-    tasks = []
-    for company, text in extracted_texts.items():
-        tasks.append(_process_single_summary(company, text, summarize_chain))
+    async def _download_extract(company: str, url: str) -> None:
+        async with download_semaphore:
+            try:
+                _, text_path = await asyncio.get_running_loop().run_in_executor(
+                    _report_download_executor, _process_single_report_download_extract, company, url
+                )
+                logger.info(f"Research Tools: Download/Extract completed for {company}.")
+            except Exception as e:
+                logger.error(
+                    f"Research Tools: Exception retrieving result for {company} in download/extract: {e}",
+                    exc_info=True,
+                )
+                text_path = f"Error retrieving download/extract result: {e}"
+        await extracted_queue.put((company, text_path))
 
-    # Run all summarization tasks concurrently
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    async def _summarize(company: str, text_path: str) -> str:
+        async with summary_semaphore:
+            try:
+                text = await asyncio.to_thread(_load_extracted_text, text_path)
+                _, summary = await _process_single_summary(company, text, summarize_chain, semantic_cache)
+                logger.info(f"Research Tools: Summarization completed for {company}.")
+                return summary
+            except Exception as e:
+                logger.error(f"Research Tools: Exception during summarization for {company}: {e}", exc_info=True)
+                return f"Error retrieving summarization result: {e}"
+
+    producers = [asyncio.create_task(_download_extract(company, url)) for company, url in report_urls.items()]
+    text_paths_by_company: Dict[str, str] = {}
+    summary_tasks: Dict[str, asyncio.Task] = {}
+    for _ in producers:
+        company, text_path = await extracted_queue.get()
+        text_paths_by_company[company] = text_path
+        summary_tasks[company] = asyncio.create_task(_summarize(company, text_path))
+
+    await asyncio.gather(*producers)
+    summaries = await asyncio.gather(*summary_tasks.values())
+    summaries_by_company = dict(zip(summary_tasks.keys(), summaries))
+
+    logger.info("Research Tools: Finished pipelined download, extraction and summarization.")
+    extracted_text_paths = {company: text_paths_by_company[company] for company in report_urls}
+    individual_summaries = {company: summaries_by_company[company] for company in report_urls}
+    return extracted_text_paths, individual_summaries
+
+
+def _normalize_line(line: str) -> str:
+    """Normalizes a summary line for duplicate detection (case, bullets and whitespace insensitive)."""
+    return _WHITESPACE_RE.sub(" ", line.strip(" \t-*•").lower())
 
-    for i, company in enumerate(extracted_texts.keys()):
-        result_or_exception = results[i]
-        if isinstance(result_or_exception, Exception):
-            logger.error(
-                f"Research Tools: Exception during summarization for {company}: {result_or_exception}",
-                exc_info=result_or_exception,
-            )
-            individual_summaries[company] = f"Error retrieving summarization result: {result_or_exception}"
-        else:
-            _, summary_text = result_or_exception
-            individual_summaries[company] = summary_text
-            logger.info(f"Research Tools: Summarization completed for {company}.")
 
-    logger.info("Research Tools: Finished concurrent summarization.")
-    return individual_summaries
+def prepare_summaries_for_synthesis(
+    summaries: Dict[str, str], max_chars_per_summary: int = MAX_SUMMARY_CHARS_FOR_SYNTHESIS
+) -> Dict[str, str]:
+    """Deduplicates repeated lines across company summaries and caps each summary's length.
+
+    Args:
+        summaries: A dictionary mapping company names to their (valid) summaries.
+        max_chars_per_summary: The maximum number of characters kept for each summary.
+
+    Returns:
+        A dictionary mapping company names to the compacted summaries, in the same order.
+    """
+    seen_lines = set()
+    compacted: Dict[str, str] = {}
+    for company, summary in summaries.items():
+        kept_lines = []
+        kept_chars = 0
+        for line in summary.splitlines():
+            normalized = _normalize_line(line)
+            if len(normalized) >= MIN_DEDUP_LINE_CHARS:
+                if normalized in seen_lines:
+                    continue
+                seen_lines.add(normalized)
+            if kept_chars + len(line) > max_chars_per_summary:
+                logger.info(f"Research Tools: Truncated summary for {company} to {kept_chars} characters.")
+                break
+            kept_lines.append(line)
+            kept_chars += len(line) + 1
+        compacted[company] = "\n".join(kept_lines).strip()
+
+    chars_before = sum(len(summary) for summary in summaries.values())
+    chars_after = sum(len(summary) for summary in compacted.values())
+    logger.info(
+        f"Research Tools: Synthesis context compacted from {chars_before} to {chars_after} characters "
+        f"(~{chars_before // 4} -> ~{chars_after // 4} tokens)."
+    )
+    return compacted
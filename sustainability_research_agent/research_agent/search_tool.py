@@ -1,16 +1,71 @@
 import logging
+import threading
+from typing import Dict, List
 
 from duckduckgo_search import DDGS
 from langchain.tools import Tool
 
+from research_agent.ttl_cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 MAX_SEARCH_RESULTS = 5
+SEARCH_CACHE_MAX_ENTRIES = 1024
+SEARCH_CACHE_TTL_SECONDS = 3600
+
+# Identical searches within a run (retries, duplicate companies, repeated ReAct actions) are served from memory
+_search_cache = TTLCache(maxsize=SEARCH_CACHE_MAX_ENTRIES, ttl_seconds=SEARCH_CACHE_TTL_SECONDS)
+
+# DDGS instances are not thread-safe, so each worker thread reuses its own long-lived client (and its pooled
+# HTTPS connections) instead of creating a new one, with a fresh TLS handshake, for every search
+_thread_local = threading.local()
 
 # --- Core Search Functionality ---
 
 
+def _get_ddgs() -> DDGS:
+    """Returns the calling thread's DuckDuckGo search client, creating it on first use."""
+    ddgs = getattr(_thread_local, "ddgs", None)
+    if ddgs is None:
+        ddgs = DDGS()
+        _thread_local.ddgs = ddgs
+    return ddgs
+
+
+def fetch_search_results(
+    query: str, max_results: int = MAX_SEARCH_RESULTS, use_cache: bool = True
+) -> List[Dict[str, str]]:
+    """
+    Performs a web search using DuckDuckGo and returns the structured results, using the search cache.
+    Only non-empty results are cached; errors propagate to the caller.
+
+    Args:
+        query: The search query string.
+        max_results: The maximum number of search results to return.
+        use_cache: Whether a cached result may be returned. When False, DuckDuckGo is always queried
+            (e.g. when retrying because the cached results were not useful); the fresh results are still cached.
+
+    Returns:
+        A list of result dictionaries with "title", "href" and "body" keys (empty if nothing was found).
+    """
+    cache_key = (query, max_results)
+    cached_results = _search_cache.get(cache_key) if use_cache else None
+    if cached_results is not None:
+        logger.info(f"Search cache hit for query: '{query}' (max_results={max_results})")
+        return cached_results
+
+    logger.info(f"Performing DuckDuckGo search for query: '{query}' (max_results={max_results})")
+    search_results = _get_ddgs().text(query, max_results=max_results)
+    results_list = list(search_results)[:max_results] if search_results else []
+    if results_list:
+        logger.info(f"Found {len(results_list)} search results.")
+        _search_cache.set(cache_key, results_list)
+    else:
+        logger.warning(f"No search results found for query: '{query}'")
+    return results_list
+
+
 def _perform_duckduckgo_search(query: str, max_results: int = MAX_SEARCH_RESULTS) -> str:
     """
     Performs a web search using DuckDuckGo and returns formatted results as a string.
@@ -23,17 +78,8 @@ def _perform_duckduckgo_search(query: str, max_results: int = MAX_SEARCH_RESULTS
     Returns:
         A formatted string containing the search results, or a message indicating no results.
     """
-    logger.info(f"Performing DuckDuckGo search for query: '{query}' (max_results={max_results})")
-    results_list = []
     try:
-        with DDGS() as ddgs:
-            search_results = ddgs.text(query, max_results=max_results)
-            if search_results:
-                results_list = list(search_results)[:max_results]
-                logger.info(f"Found {len(results_list)} search results.")
-            else:
-                logger.warning(f"No search results found for query: '{query}'")
-                return "No relevant search results found."
+        results_list = fetch_search_results(query, max_results=max_results)
     except Exception as e:
         logger.error(f"Error during DuckDuckGo search for query '{query}': {e}")
         return f"Error during search: {e}"
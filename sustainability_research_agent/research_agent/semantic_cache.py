@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# Only the start of a text is embedded: enough to recognise the same report, and within embedding model limits
+SEMANTIC_CACHE_EMBED_CHARS = 8192
+SEMANTIC_CACHE_SIMILARITY_THRESHOLD = 0.95
+
+VECTORS_FILENAME = "vectors.npy"
+ENTRIES_FILENAME = "entries.json"
+INITIAL_CAPACITY = 64
+
+
+def _normalise_label(label: str) -> str:
+    return label.strip().casefold()
+
+
+class SemanticCache:
+    """Embedding-similarity cache: returns the stored value of a previously seen text that is close enough.
+
+    Every entry carries a label (e.g. the company a report belongs to) and a lookup only considers entries whose
+    label matches (ignoring case and surrounding whitespace), so near-identical texts under another label never hit.
+    Vectors are L2-normalised float32 rows of a preallocated matrix (grown by doubling), so a lookup is a single
+    BLAS matrix-vector product over the matching rows and adding an entry is amortised O(1). The index is persisted
+    in cache_dir as a NumPy array plus a JSON list of entries; loading and persisting run in a worker thread so
+    the event loop is never blocked on disk I/O. Embedding and index failures (e.g. an index built with another
+    embedding dimension) are logged and treated as cache misses so they never break the caller.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache_dir: Path,
+        similarity_threshold: float = SEMANTIC_CACHE_SIMILARITY_THRESHOLD,
+        embed_chars: int = SEMANTIC_CACHE_EMBED_CHARS,
+    ):
+        self.embeddings = embeddings
+        self.cache_dir = Path(cache_dir)
+        self.similarity_threshold = similarity_threshold
+        self.embed_chars = embed_chars
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None  # Capacity-sized; only the first len(self._entries) rows are used
+        self._entries: List[dict] = []
+        self._loaded = False
+
+    def _load(self) -> None:
+        """Loads the persisted index on first use (must be called with the lock held)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        vectors_path = self.cache_dir / VECTORS_FILENAME
+        entries_path = self.cache_dir / ENTRIES_FILENAME
+        if not (vectors_path.exists() and entries_path.exists()):
+            return
+        try:
+            vectors = np.load(vectors_path).astype(np.float32, copy=False)
+            with open(entries_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            if len(entries) != len(vectors):
+                raise ValueError(f"{len(entries)} entries for {len(vectors)} vectors")
+            self._vectors, self._entries = vectors, entries
+            logger.info(f"Semantic Cache: Loaded {len(entries)} entries from {self.cache_dir}")
+        except Exception as e:
+            logger.warning(f"Semantic Cache: Failed to load index from {self.cache_dir}: {e}. Starting empty.")
+
+    def warm_up(self) -> None:
+        """Loads the persisted index now instead of on the first lookup."""
+        with self._lock:
+            self._load()
+
+    def _persist(self) -> None:
+        """Writes the index to disk (must be called with the lock held)."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        np.save(self.cache_dir / VECTORS_FILENAME, self._vectors[: len(self._entries)])
+        with open(self.cache_dir / ENTRIES_FILENAME, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+
+    def _ensure_capacity(self, rows: int, dimensions: int) -> None:
+        """Grows the vector matrix (doubling its capacity) so it can hold rows entries (lock must be held)."""
+        if self._vectors is not None and self._vectors.shape[0] >= rows:
+            return
+        capacity = max(INITIAL_CAPACITY, rows, 2 * (0 if self._vectors is None else self._vectors.shape[0]))
+        grown = np.zeros((capacity, dimensions), dtype=np.float32)
+        if self._entries:
+            grown[: len(self._entries)] = self._vectors[: len(self._entries)]
+        self._vectors = grown
+
+    async def _aembed(self, text: str) -> Optional[np.ndarray]:
+        """Embeds the start of text as a normalised vector, or returns None on failure."""
+        try:
+            vector = np.asarray(await self.embeddings.aembed_query(text[: self.embed_chars]), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Semantic Cache: Embedding failed, skipping semantic cache: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _nearest(self, vector: np.ndarray, label: str) -> Optional[tuple]:
+        """Returns (similarity, entry) of the stored vector closest to vector among the entries with a matching label,
+        or None if there are none."""
+        normalised_label = _normalise_label(label)
+        with self._lock:
+            self._load()
+            rows = [i for i, entry in enumerate(self._entries) if _normalise_label(entry["label"]) == normalised_label]
+            if not rows:
+                return None
+            similarities = self._vectors[rows] @ vector
+            best = int(np.argmax(similarities))
+            return float(similarities[best]), self._entries[rows[best]]
+
+    def _add(self, vector: np.ndarray, value: str, label: str) -> None:
+        """Appends an entry to the index and persists it."""
+        with self._lock:
+            self._load()
+            self._ensure_capacity(len(self._entries) + 1, vector.shape[0])
+            self._vectors[len(self._entries)] = vector
+            self._entries.append({"label": label, "value": value})
+            try:
+                self._persist()
+            except Exception as e:
+                logger.error(f"Semantic Cache: Failed to persist index to {self.cache_dir}: {e}")
+
+    async def alookup(self, text: str, label: str = "") -> Optional[str]:
+        """Returns the cached value for the most similar text stored under label, if it meets the similarity
+        threshold."""
+        vector = await self._aembed(text)
+        if vector is None:
+            return None
+        try:
+            nearest = await asyncio.to_thread(self._nearest, vector, label)
+        except Exception as e:
+            logger.warning(f"Semantic Cache: Lookup failed, skipping semantic cache: {e}")
+            return None
+        if nearest is None:
+            return None
+        score, entry = nearest
+        if score < self.similarity_threshold:
+            logger.info(f"Semantic Cache: Miss (best similarity {score:.3f} with '{entry['label']}').")
+            return None
+        logger.info(f"Semantic Cache: Hit (similarity {score:.3f} with '{entry['label']}').")
+        return entry["value"]
+
+    async def aupdate(self, text: str, value: str, label: str = "") -> None:
+        """Stores value under the embedding of text; only lookups with the same label can return it."""
+        vector = await self._aembed(text)
+        if vector is None:
+            return
+        try:
+            await asyncio.to_thread(self._add, vector, value, label)
+        except Exception as e:
+            logger.warning(f"Semantic Cache: Failed to add entry '{label}': {e}")
@@ -0,0 +1,65 @@
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Cached summaries expire so that reports re-published under the same URL/name are eventually re-summarized
+SUMMARY_TTL_SECONDS = 30 * 24 * 3600
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    """Opens the summary store, creating the database file and its table if needed."""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS summaries (
+            cache_key TEXT PRIMARY KEY,
+            company TEXT NOT NULL,  -- For human inspection: which company the summarized report belongs to
+            summary TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    """)
+    return conn
+
+
+def get_cached_summary(db_path: Path, cache_key: str) -> Optional[str]:
+    """Returns the unexpired summary stored under cache_key, or None on a miss or database error."""
+    conn = None
+    try:
+        conn = _connect(db_path)
+        row = conn.execute(
+            "SELECT summary FROM summaries WHERE cache_key = ? AND expires_at > ?", (cache_key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+    except sqlite3.Error as e:
+        logger.warning(f"Summary Store: Failed to read summary {cache_key} from {db_path}: {e}")
+        return None
+    finally:
+        if conn:
+            conn.close()
+
+
+def save_summary(
+    db_path: Path, cache_key: str, company: str, summary: str, ttl_seconds: float = SUMMARY_TTL_SECONDS
+) -> None:
+    """Stores (or replaces) a summary atomically and prunes expired entries."""
+    conn = None
+    try:
+        conn = _connect(db_path)
+        now = time.time()
+        with conn:  # Commits both statements in one transaction
+            conn.execute("DELETE FROM summaries WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (cache_key, company, summary, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (cache_key, company, summary, now, now + ttl_seconds),
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Summary Store: Failed to save summary for {company} to {db_path}: {e}")
+    finally:
+        if conn:
+            conn.close()
@@ -3,14 +3,13 @@ import logging
 import os
 
 import langchain
-from langchain.chains.summarize import load_summarize_chain
-from langchain.prompts import PromptTemplate
 from logging_config import setup_logging
+from prompts import load_prompt_template
 
 # Project-specific imports
 from research_agent.agent import initialize_gemini
 from research_agent.file_tools import download_pdf_tool, extract_pdf_text_tool
-from research_agent.research_tools import _process_single_summary  # Reusing this function
+from research_agent.research_tools import MapReduceSummarizer, _process_single_summary
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -26,45 +25,11 @@ def get_summarize_chain():
         # We only need the summarizer LLM from the tuple
         _, llm_summarizer = initialize_gemini()
 
-        # Determine prompts directory relative to this file's location
-        # Assuming single_pdf_analyzer.py is in sustainability_research_agent/
-        # and prompts are in sustainability_research_agent/prompts/
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        prompts_dir = os.path.join(current_dir, "prompts")
-
-        if not os.path.isdir(prompts_dir):
-            # Fallback if running from project root and current_dir is not as expected
-            project_root_prompts_dir = os.path.join(os.getcwd(), "sustainability_research_agent", "prompts")
-            if os.path.isdir(project_root_prompts_dir):
-                prompts_dir = project_root_prompts_dir
-            else:
-                logger.error(f"Prompts directory not found at {prompts_dir} or {project_root_prompts_dir}")
-                raise FileNotFoundError(
-                    f"Prompts directory not found. Looked in {prompts_dir} and {project_root_prompts_dir}"
-                )
-
-        with open(os.path.join(prompts_dir, "map_prompt.txt"), "r") as f:
-            map_prompt_template = f.read()
-        map_prompt = PromptTemplate.from_template(map_prompt_template)
-
-        with open(os.path.join(prompts_dir, "combine_prompt.txt"), "r") as f:
-            combine_prompt_template = f.read()
-        combine_prompt = PromptTemplate.from_template(combine_prompt_template)
-
-        summarize_chain = load_summarize_chain(
-            llm=llm_summarizer,
-            chain_type="map_reduce",
-            map_prompt=map_prompt,
-            combine_prompt=combine_prompt,
-            verbose=False,  # Explicitly disable LangChain's verbose operational logs for this chain
-            return_intermediate_steps=True,  # To get map stage outputs for debugging
-            # Pass token_max to the ReduceDocumentsChain to handle larger combined documents in fewer steps
-            token_max=250000,  # Pass token_max to the ReduceDocumentsChain
-        )
-        logger.info(
-            "Single PDF Analyzer: Summarize chain initialized (chain verbosity disabled, "
-            "returning intermediate steps, increased reduce token_max)."
-        )
+        map_prompt = load_prompt_template("map_prompt.txt")
+        combine_prompt = load_prompt_template("combine_prompt.txt")
+
+        summarize_chain = MapReduceSummarizer(llm_summarizer, map_prompt, combine_prompt)
+        logger.info("Single PDF Analyzer: Map-reduce summarizer initialized.")
         return summarize_chain
     except Exception as e:
         logger.error(f"Failed to initialize summarization chain: {e}", exc_info=True)
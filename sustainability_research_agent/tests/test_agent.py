@@ -0,0 +1,37 @@
+import pytest
+from research_agent import agent
+
+
+@pytest.fixture(autouse=True)
+def clear_llm_clients():
+    agent.initialize_gemini.cache_clear()
+    yield
+    agent.initialize_gemini.cache_clear()
+
+
+def test_initialize_gemini_raises_without_api_key(monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+
+    with pytest.raises(RuntimeError, match="GOOGLE_API_KEY"):
+        agent.initialize_gemini()
+
+
+def test_initialize_gemini_creates_clients_once(monkeypatch, mocker):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    mocker.patch.object(agent, "configure_llm_cache")
+    mock_chat = mocker.patch.object(agent, "ChatGoogleGenerativeAI")
+
+    first = agent.initialize_gemini()
+    second = agent.initialize_gemini()
+
+    assert first is second
+    assert mock_chat.call_count == 2  # Main and summarization models, created on the first call only
+
+
+def test_load_prompt_parses_template_once():
+    agent.load_prompt.cache_clear()
+
+    first = agent.load_prompt()
+
+    assert agent.load_prompt() is first
+    assert "input" in first.input_variables
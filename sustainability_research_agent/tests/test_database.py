@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+from research_agent import database
+
+
+@pytest.fixture(autouse=True)
+def temp_db(mocker, tmp_path):
+    """Point the task database at a temporary file."""
+    mocker.patch.object(database, "DB_PATH", str(tmp_path / "analysis_history.db"))
+    database.init_db()
+
+
+def test_get_task_returns_latest_status_and_keeps_start_time():
+    database.log_task_status("task-1", "Steel", "PENDING")
+    database.log_task_status("task-1", "Steel", "RUNNING", start_time="2025-01-01T10:00:00")
+    database.log_task_status("task-1", "Steel", "COMPLETED", result_summary="Trends...", duration_seconds=42)
+
+    task = database.get_task("task-1")
+
+    assert task == {
+        "task_id": "task-1",
+        "industry": "Steel",
+        "status": "COMPLETED",
+        "result_summary": "Trends...",
+        "start_time": "2025-01-01T10:00:00",
+        "duration_seconds": 42,
+    }
+
+
+def test_get_task_returns_none_for_unknown_task():
+    assert database.get_task("missing") is None
+
+
+def test_find_active_task_matches_in_progress_task_for_industry():
+    database.log_task_status("task-1", "Steel", "RUNNING")
+    database.log_task_status("task-2", "Cement", "COMPLETED", result_summary="Done")
+
+    assert database.find_active_task("steel", max_age_seconds=3600) == "task-1"
+    assert database.find_active_task("Cement", max_age_seconds=3600) is None
+
+
+def test_find_active_task_ignores_stale_tasks():
+    database.log_task_status("task-1", "Steel", "RUNNING")
+    with sqlite3.connect(database.DB_PATH) as conn:
+        conn.execute("UPDATE analysis_tasks SET timestamp = datetime('now', '-3 hours') WHERE task_id = 'task-1'")
+
+    assert database.find_active_task("Steel", max_age_seconds=3600) is None
+
+
+def test_find_completed_task_returns_newest_recent_completed_task():
+    database.log_task_status("task-1", "Steel", "COMPLETED", result_summary="Old")
+    database.log_task_status("task-2", "Steel", "COMPLETED", result_summary="New")
+    database.log_task_status("task-3", "Steel", "FAILED", result_summary="Error")
+    with sqlite3.connect(database.DB_PATH) as conn:
+        conn.execute("UPDATE analysis_tasks SET timestamp = datetime('now', '-1 hours') WHERE task_id = 'task-1'")
+
+    assert database.find_completed_task("steel", max_age_seconds=3 * 3600) == "task-2"
+    assert database.find_active_task("Steel", max_age_seconds=3600) is None
+    with sqlite3.connect(database.DB_PATH) as conn:
+        conn.execute("UPDATE analysis_tasks SET timestamp = datetime('now', '-7 hours') WHERE task_id = 'task-2'")
+    assert database.find_completed_task("Steel", max_age_seconds=3 * 3600) == "task-1"
+    assert database.find_completed_task("Steel", max_age_seconds=1800) is None
+
+
+def test_query_tasks_returns_completed_tasks_optionally_filtered_by_industry():
+    database.log_task_status("task-1", "Steel", "COMPLETED", result_summary="Steel trends")
+    database.log_task_status("task-2", "Cement", "COMPLETED", result_summary="Cement trends")
+    database.log_task_status("task-3", "Steel", "RUNNING")
+
+    assert {task["task_id"] for task in database.query_tasks()} == {"task-1", "task-2"}
+    assert [task["task_id"] for task in database.query_tasks(industry_filter="steel")] == ["task-1"]
+    assert len(database.query_tasks(limit=1)) == 1
@@ -1,16 +1,25 @@
+import concurrent.futures
+import hashlib
 import os
 from unittest.mock import MagicMock, mock_open
 
 import pytest
 import requests
+from research_agent import file_tools
 from research_agent.file_tools import (
     CACHE_DIR,
+    CONTENT_DIR_NAME,
+    _extract_pages_with_pdfium,
+    _extracted_text_memory_cache,
+    _file_sha256,
     _is_valid_url,
     _url_to_filename,
     download_pdf,
     download_pdf_tool,
     extract_pdf_text_tool,
     extract_text_from_pdf,
+    extract_text_to_file,
+    warm_up_pdf_extraction_pool,
 )
 
 # --- Test Helper Functions ---
@@ -56,9 +65,11 @@ def test_url_to_filename():
 
 
 @pytest.fixture(autouse=True)
-def ensure_cache_dir():
-    """Ensure cache directory exists before tests and is cleaned after."""
+def ensure_cache_dir(mocker, tmp_path):
+    """Ensure cache directory exists before tests and isolate the extracted text cache."""
     os.makedirs(CACHE_DIR, exist_ok=True)
+    mocker.patch("research_agent.file_tools.TEXT_CACHE_DIR", str(tmp_path / "text_cache"))
+    _extracted_text_memory_cache.clear()
     yield
     # Optional: Clean up cache dir contents after tests if needed
 
@@ -72,8 +83,8 @@ def test_download_pdf_cache_hit(mocker):
     with open(filepath, "w") as f:
         f.write("dummy pdf content")
 
-    # Mock requests.get to ensure it's NOT called
-    mock_get = mocker.patch("research_agent.file_tools.requests.get")
+    # Mock the shared session's get to ensure it's NOT called
+    mock_get = mocker.patch("research_agent.file_tools._http_session.get")
 
     result = download_pdf(url)
 
@@ -93,24 +104,28 @@ def test_download_pdf_cache_miss_success(mocker):
     if os.path.exists(filepath):
         os.remove(filepath)
 
-    # Mock requests.get response
+    # Mock the shared session's get response
     mock_response = MagicMock()
     mock_response.raise_for_status.return_value = None
     mock_response.headers = {"content-type": "application/pdf"}
     mock_response.iter_content.return_value = [b"pdf", b" content"]
     mock_get = mocker.patch(
-        "research_agent.file_tools.requests.get",
+        "research_agent.file_tools._http_session.get",
         return_value=mock_response,
     )
 
     m = mock_open()
     mocker.patch("builtins.open", m)
+    mock_replace = mocker.patch("research_agent.file_tools.os.replace")
 
     result = download_pdf(url)
 
     assert result == filepath
     mock_get.assert_called_once()
-    m.assert_called_once_with(filepath, "wb")
+    tmp_filepath = m.call_args.args[0]
+    assert tmp_filepath.startswith(filepath) and tmp_filepath.endswith(".part")
+    m.assert_called_once_with(tmp_filepath, "wb")
+    mock_replace.assert_called_once_with(tmp_filepath, filepath)
     handle = m()
     handle.write.assert_any_call(b"pdf")
     handle.write.assert_any_call(b" content")
@@ -118,14 +133,60 @@ def test_download_pdf_cache_miss_success(mocker):
     # Actual file won't be created due to mock_open, so no cleanup needed here
 
 
+def test_download_pdf_shares_storage_for_identical_content_from_different_urls(mocker):
+    """Test that two URLs serving the same PDF bytes end up as hard links to one file."""
+    urls = ["http://example.com/mirror_a.pdf", "http://mirror.example.org/mirror_b.pdf"]
+    filepaths = [os.path.join(CACHE_DIR, _url_to_filename(url)) for url in urls]
+
+    def fake_get(url, **kwargs):
+        response = MagicMock()
+        response.headers = {"content-type": "application/pdf"}
+        response.iter_content.return_value = [b"%PDF-1.4 identical ", b"report bytes"]
+        return response
+
+    mocker.patch("research_agent.file_tools._http_session.get", side_effect=fake_get)
+
+    try:
+        assert [download_pdf(url) for url in urls] == filepaths
+        assert os.path.samefile(filepaths[0], filepaths[1])
+        with open(filepaths[1], "rb") as f:
+            assert f.read() == b"%PDF-1.4 identical report bytes"
+    finally:
+        content_filepath = os.path.join(
+            CACHE_DIR, CONTENT_DIR_NAME, hashlib.sha256(b"%PDF-1.4 identical report bytes").hexdigest() + ".pdf"
+        )
+        for path in filepaths + [content_filepath]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def test_download_pdf_deadline_exceeded(mocker):
+    """Test that a download still streaming past the overall deadline is abandoned and cleaned up."""
+    url = "http://example.com/slow_report.pdf"
+    filepath = os.path.join(CACHE_DIR, _url_to_filename(url))
+
+    mock_response = MagicMock()
+    mock_response.headers = {"content-type": "application/pdf"}
+    mock_response.iter_content.return_value = [b"pdf", b" content"]
+    mocker.patch("research_agent.file_tools._http_session.get", return_value=mock_response)
+    mocker.patch("research_agent.file_tools.DOWNLOAD_DEADLINE_SECONDS", -1)
+    mocker.patch("research_agent.file_tools.time.sleep")
+
+    result = download_pdf(url)
+
+    assert result.startswith("Error: Failed to download PDF")
+    assert "timeout" in result
+    assert not [name for name in os.listdir(CACHE_DIR) if name.startswith(os.path.basename(filepath))]
+
+
 def test_download_pdf_request_error(mocker):
     """Test download failure due to requests error."""
     url = "http://example.com/error.pdf"
     filename = _url_to_filename(url)
     filepath = os.path.join(CACHE_DIR, filename)
 
-    # Mock requests.get to raise an error
-    mock_get = mocker.patch("research_agent.file_tools.requests.get")
+    # Mock the shared session's get to raise an error
+    mock_get = mocker.patch("research_agent.file_tools._http_session.get")
     mock_get.side_effect = requests.exceptions.RequestException("Connection failed")
 
     result = download_pdf(url)
@@ -182,6 +243,169 @@ def test_extract_text_from_pdf_no_text(mocker):
     os.remove(filepath)
 
 
+def test_extract_text_from_pdf_uses_text_cache(mocker):
+    """Test that a second extraction of the same PDF content is served from the text cache."""
+    filepath = os.path.join(CACHE_DIR, "dummy_text_cache.pdf")
+    with open(filepath, "w") as f:
+        f.write("not real pdf")
+
+    mock_page = MagicMock()
+    mock_page.extract_text.return_value = "Cached page text."
+    mock_reader_instance = MagicMock()
+    mock_reader_instance.pages = [mock_page]
+    mock_reader = mocker.patch(
+        "research_agent.file_tools.PdfReader",
+        return_value=mock_reader_instance,
+    )
+
+    first = extract_text_from_pdf(filepath)
+    second = extract_text_from_pdf(filepath)
+
+    assert first == second == "Cached page text.\n"
+    mock_reader.assert_called_once()
+
+    os.remove(filepath)
+
+
+def test_extract_text_from_pdf_memory_cache_is_keyed_by_file_stat(mocker):
+    """Test that repeat extractions are served from memory without reading the file, until the file changes."""
+    filepath = os.path.join(CACHE_DIR, "dummy_memory_cache.pdf")
+    with open(filepath, "w") as f:
+        f.write("not real pdf content for the memory cache")
+
+    mocker.patch("research_agent.file_tools._run_in_extraction_pool", return_value=["First text."])
+    file_sha256_spy = mocker.spy(file_tools, "_file_sha256")
+
+    assert extract_text_from_pdf(filepath) == "First text.\n"
+    assert extract_text_from_pdf(filepath) == "First text.\n"
+    assert file_sha256_spy.call_count == 1
+
+    with open(filepath, "w") as f:
+        f.write("replaced pdf content with a different size")
+    mocker.patch("research_agent.file_tools._run_in_extraction_pool", return_value=["Second text."])
+
+    assert extract_text_from_pdf(filepath) == "Second text.\n"
+
+    os.remove(filepath)
+
+
+def test_extract_text_to_file_returns_cached_text_path(mocker):
+    """Test that extraction to file returns the text cache path and reuses it without re-parsing."""
+    filepath = os.path.join(CACHE_DIR, "dummy_text_file.pdf")
+    with open(filepath, "w") as f:
+        f.write("not real pdf content for text file")
+
+    mock_page = MagicMock()
+    mock_page.extract_text.return_value = "Page text."
+    mock_reader_instance = MagicMock()
+    mock_reader_instance.pages = [mock_page]
+    mock_reader = mocker.patch("research_agent.file_tools.PdfReader", return_value=mock_reader_instance)
+
+    first = extract_text_to_file(filepath)
+    second = extract_text_to_file(filepath)
+
+    assert first == second
+    assert first.endswith(".txt")
+    with open(first, encoding="utf-8") as f:
+        assert f.read() == "Page text.\n"
+    mock_reader.assert_called_once()
+
+    os.remove(filepath)
+
+
+def test_extract_text_from_pdf_failed_cache_write_leaves_no_partial_file(mocker, tmp_path):
+    """Test that a failed text cache write returns the text but leaves neither a cache nor a temporary file."""
+    filepath = os.path.join(CACHE_DIR, "dummy_atomic_cache.pdf")
+    with open(filepath, "w") as f:
+        f.write("not real pdf content for atomic cache write")
+
+    mock_page = MagicMock()
+    mock_page.extract_text.return_value = "Page text."
+    mock_reader_instance = MagicMock()
+    mock_reader_instance.pages = [mock_page]
+    mocker.patch("research_agent.file_tools.PdfReader", return_value=mock_reader_instance)
+    mocker.patch("research_agent.file_tools.os.replace", side_effect=OSError("disk full"))
+
+    result = extract_text_from_pdf(filepath)
+
+    assert result == "Page text.\n"
+    cache_prefix = _file_sha256(filepath)
+    assert not [name for name in os.listdir(tmp_path / "text_cache") if name.startswith(cache_prefix)]
+
+    os.remove(filepath)
+
+
+def test_extract_text_from_pdf_parses_large_pdfs_in_page_batches(mocker):
+    """Test that PDFs above the page threshold are split into ordered page batches across the pool."""
+    filepath = os.path.join(CACHE_DIR, "dummy_large.pdf")
+    with open(filepath, "w") as f:
+        f.write("not real pdf")
+
+    mock_pages = [MagicMock() for _ in range(25)]
+    for i, mock_page in enumerate(mock_pages):
+        mock_page.extract_text.return_value = f"Page {i + 1}." if i % 5 else ""
+    mock_reader_instance = MagicMock()
+    mock_reader_instance.pages = mock_pages
+    mock_reader = mocker.patch("research_agent.file_tools.PdfReader", return_value=mock_reader_instance)
+    mock_pool = concurrent.futures.ThreadPoolExecutor(max_workers=3)
+    mocker.patch("research_agent.file_tools._get_pdf_extraction_pool", return_value=mock_pool)
+    submit_spy = mocker.spy(mock_pool, "submit")
+
+    result = extract_text_from_pdf(filepath)
+    mock_pool.shutdown()
+
+    assert result == "".join(f"Page {i + 1}.\n" for i in range(25) if i % 5)
+    # The first submission is the PDFium attempt, which rejects the dummy file
+    assert [call.args[2:] for call in submit_spy.call_args_list[1:]] == [(0, 10), (10, 20), (20, 30)]
+    assert mock_reader.call_count == 4  # One to count pages, one per batch worker
+
+    os.remove(filepath)
+
+
+def test_extract_text_from_pdf_prefers_pdfium(mocker):
+    """Test that text extracted by PDFium is used without parsing the PDF with pypdf."""
+    filepath = os.path.join(CACHE_DIR, "dummy_pdfium.pdf")
+    with open(filepath, "w") as f:
+        f.write("not real pdf content for pdfium")
+
+    mocker.patch("research_agent.file_tools._run_in_extraction_pool", return_value=["Page 1.", "Page 2."])
+    mock_reader = mocker.patch("research_agent.file_tools.PdfReader")
+
+    result = extract_text_from_pdf(filepath)
+
+    assert result == "Page 1.\nPage 2.\n"
+    mock_reader.assert_not_called()
+
+    os.remove(filepath)
+
+
+def test_extract_pages_with_pdfium_normalizes_line_breaks_and_skips_empty_pages(mocker):
+    """Test that PDFium page texts use LF line breaks, blank pages are dropped and the document is closed."""
+    mock_pages = [MagicMock(), MagicMock(), MagicMock()]
+    for mock_page, page_text in zip(mock_pages, ["Line 1\r\nLine 2", " \r\n", "Page 3"]):
+        mock_page.get_textpage.return_value.get_text_range.return_value = page_text
+    mock_pdf = MagicMock()
+    mock_pdf.__len__.return_value = len(mock_pages)
+    mock_pdf.__getitem__.side_effect = mock_pages.__getitem__
+    mocker.patch("research_agent.file_tools.pdfium.PdfDocument", return_value=mock_pdf)
+
+    assert _extract_pages_with_pdfium("report.pdf") == ["Line 1\nLine 2", "Page 3"]
+    mock_pdf.close.assert_called_once()
+
+
+def test_warm_up_pdf_extraction_pool_starts_every_worker(mocker):
+    """Test that warm-up runs one trivial task per worker on the shared pool."""
+    mock_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    mocker.patch("research_agent.file_tools._get_pdf_extraction_pool", return_value=mock_pool)
+    mocker.patch("research_agent.file_tools.PDF_EXTRACTION_WORKERS", 2)
+    submit_spy = mocker.spy(mock_pool, "submit")
+
+    warm_up_pdf_extraction_pool()
+    mock_pool.shutdown()
+
+    assert submit_spy.call_count == 2
+
+
 def test_extract_text_from_pdf_file_not_found():
     """Test extraction when file doesn't exist."""
     filepath = os.path.join(CACHE_DIR, "non_existent.pdf")
@@ -0,0 +1,13 @@
+from langchain_core.outputs import Generation
+from research_agent.llm_cache import InstrumentedSQLiteCache
+
+
+def test_instrumented_sqlite_cache_counts_hits_and_misses(tmp_path):
+    cache = InstrumentedSQLiteCache(database_path=str(tmp_path / "llm_cache.db"))
+
+    assert cache.lookup("prompt", "model") is None
+    cache.update("prompt", "model", [Generation(text="cached answer")])
+    cached = cache.lookup("prompt", "model")
+
+    assert cached[0].text == "cached answer"
+    assert cache.stats() == {"hits": 1, "misses": 1}
@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
+from research_agent import research_tools
+from research_agent.research_tools import (
+    MapReduceSummarizer,
+    download_and_summarize_reports,
+    prepare_summaries_for_synthesis,
+)
+from research_agent.semantic_cache import SemanticCache
+
+
+@pytest.fixture(autouse=True)
+def isolated_summary_cache(mocker, tmp_path):
+    """Point the summary cache at a temporary directory so tests never read or write real summaries."""
+    mocker.patch.object(research_tools, "SUMMARY_CACHE_DIR", tmp_path / "summary_cache")
+
+
+class FakeSummarizeChain:
+    """Minimal stand-in for the summarize chain that records how many calls overlap."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def ainvoke(self, inputs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return {"output_text": f"Summary of {len(inputs['input_documents'])} chunk(s)."}
+
+
+def write_extracted_text(text):
+    """Writes text where the extraction step would, returning the file path it would report."""
+    text_dir = research_tools.SUMMARY_CACHE_DIR.parent / "text_cache"
+    text_dir.mkdir(exist_ok=True)
+    text_path = text_dir / f"{hashlib.sha256(text.encode('utf-8')).hexdigest()}.txt"
+    text_path.write_text(text, encoding="utf-8")
+    return str(text_path)
+
+
+def fake_download_extract(company, url):
+    return company, write_extracted_text(f"Report text for {company} from {url}.")
+
+
+def test_download_and_summarize_reports_bounds_concurrency(mocker):
+    mocker.patch.object(research_tools, "_process_single_report_download_extract", side_effect=fake_download_extract)
+    chain = FakeSummarizeChain()
+    report_urls = {f"Company {i}": f"https://example.com/{i}.pdf" for i in range(6)}
+
+    text_paths, summaries = asyncio.run(download_and_summarize_reports(report_urls, chain, max_workers=2))
+
+    assert list(text_paths) == list(report_urls)
+    assert list(summaries) == list(report_urls)
+    with open(text_paths["Company 0"], encoding="utf-8") as f:
+        assert f.read() == "Report text for Company 0 from https://example.com/0.pdf."
+    assert all(summary == "Summary of 1 chunk(s)." for summary in summaries.values())
+    assert chain.max_in_flight == 2
+
+
+def test_download_and_summarize_reports_starts_summaries_before_all_downloads_finish(mocker):
+    slow_download_started = threading.Event()
+    release_slow_download = threading.Event()
+
+    def download_extract(company, url):
+        if company == "Slow":
+            slow_download_started.set()
+            release_slow_download.wait(timeout=5)
+        return fake_download_extract(company, url)
+
+    class ReleasingSummarizeChain(FakeSummarizeChain):
+        async def ainvoke(self, inputs):
+            # Summarizing the fast report releases the slow download, proving the two overlap
+            release_slow_download.set()
+            return await super().ainvoke(inputs)
+
+    mocker.patch.object(research_tools, "_process_single_report_download_extract", side_effect=download_extract)
+    chain = ReleasingSummarizeChain()
+
+    _, summaries = asyncio.run(
+        download_and_summarize_reports({"Slow": "https://slow.com/r.pdf", "Fast": "https://fast.com/r.pdf"}, chain)
+    )
+
+    assert slow_download_started.is_set()
+    assert summaries == {"Slow": "Summary of 1 chunk(s).", "Fast": "Summary of 1 chunk(s)."}
+
+
+def test_download_and_summarize_reports_reuses_stored_summary_for_same_report(mocker):
+    mocker.patch.object(research_tools, "_process_single_report_download_extract", side_effect=fake_download_extract)
+    first_chain = FakeSummarizeChain()
+    second_chain = FakeSummarizeChain()
+    report_urls = {"Acme": "https://acme.com/r.pdf"}
+
+    asyncio.run(download_and_summarize_reports(report_urls, first_chain))
+    _, summaries = asyncio.run(download_and_summarize_reports(report_urls, second_chain))
+
+    assert summaries == {"Acme": "Summary of 1 chunk(s)."}
+    assert first_chain.max_in_flight == 1
+    assert second_chain.max_in_flight == 0
+
+
+def test_download_and_summarize_reports_resummarizes_changed_report(mocker):
+    mock_download_extract = mocker.patch.object(research_tools, "_process_single_report_download_extract")
+    chain = FakeSummarizeChain()
+    report_urls = {"Acme": "https://acme.com/r.pdf"}
+
+    mock_download_extract.return_value = ("Acme", write_extracted_text("Acme 2023 sustainability report."))
+    asyncio.run(download_and_summarize_reports(report_urls, chain))
+    mock_download_extract.return_value = ("Acme", write_extracted_text("Acme 2024 sustainability report."))
+    asyncio.run(download_and_summarize_reports(report_urls, chain))
+
+    assert len(list(research_tools.SUMMARY_CACHE_DIR.iterdir())) == 1
+    stored_rows = sqlite3.connect(research_tools.SUMMARY_CACHE_DIR / "summaries.db").execute(
+        "SELECT company FROM summaries"
+    )
+    assert [row[0] for row in stored_rows] == ["Acme", "Acme"]
+
+
+def test_download_and_summarize_reports_skips_failed_extractions(mocker):
+    mocker.patch.object(
+        research_tools, "_process_single_report_download_extract", return_value=("Acme", "Error: download failed")
+    )
+    chain = FakeSummarizeChain()
+
+    text_paths, summaries = asyncio.run(download_and_summarize_reports({"Acme": "https://acme.com/r.pdf"}, chain))
+
+    assert text_paths["Acme"] == "Error: download failed"
+    assert summaries["Acme"].startswith("Skipped")
+    assert chain.max_in_flight == 0
+
+
+def test_download_and_summarize_reports_reuses_semantically_cached_summary(mocker, tmp_path):
+    mocker.patch.object(research_tools, "_process_single_report_download_extract", side_effect=fake_download_extract)
+    semantic_cache = SemanticCache(DeterministicFakeEmbedding(size=64), tmp_path / "semantic")
+    text = "Report text for Acme from https://acme.com/r.pdf."
+    asyncio.run(semantic_cache.aupdate(text, "Previously generated Acme summary.", label="acme "))
+    chain = FakeSummarizeChain()
+
+    _, summaries = asyncio.run(
+        download_and_summarize_reports({"Acme": "https://acme.com/r.pdf"}, chain, semantic_cache=semantic_cache)
+    )
+
+    assert summaries == {"Acme": "Previously generated Acme summary."}
+    assert chain.max_in_flight == 0
+
+
+def test_map_reduce_summarizer_maps_chunks_then_combines_once():
+    prompts = []
+
+    def fake_llm(prompt):
+        prompts.append(prompt)
+        if prompt.startswith("Combine"):
+            return AIMessage(content=f"Combined: {prompt.removeprefix('Combine: ')}")
+        return AIMessage(content=prompt.removeprefix("Map: ").upper())
+
+    summarizer = MapReduceSummarizer(
+        RunnableLambda(fake_llm),
+        PromptTemplate.from_template("Map: {text}"),
+        PromptTemplate.from_template("Combine: {text}"),
+        max_concurrency=2,
+    )
+    docs = [Document(page_content=text) for text in ("chunk one", "chunk two", "chunk three")]
+
+    output = asyncio.run(summarizer.ainvoke({"input_documents": docs}))
+
+    assert output["intermediate_steps"] == ["CHUNK ONE", "CHUNK TWO", "CHUNK THREE"]
+    assert output["output_text"] == "Combined: CHUNK ONE\n\nCHUNK TWO\n\nCHUNK THREE"
+    assert len(prompts) == 4
+
+
+def test_map_reduce_summarizer_adapts_to_report_size():
+    prompts = []
+
+    def fake_llm(prompt):
+        prompts.append(prompt)
+        return AIMessage(content=f"S({prompt.split(': ', 1)[1]})")
+
+    summarizer = MapReduceSummarizer(
+        RunnableLambda(fake_llm),
+        PromptTemplate.from_template("Map: {text}"),
+        PromptTemplate.from_template("Combine: {text}"),
+        combine_group_size=2,
+    )
+
+    short = asyncio.run(summarizer.ainvoke({"input_documents": [Document(page_content="only chunk")]}))
+    assert short["output_text"] == "S(only chunk)"
+    assert len(prompts) == 1
+
+    prompts.clear()
+    docs = [Document(page_content=text) for text in ("a", "b", "c")]
+    long = asyncio.run(summarizer.ainvoke({"input_documents": docs}))
+    # Three map calls, two combine calls for the groups [a, b] and [c], then one final combine
+    assert len(prompts) == 6
+    assert long["output_text"] == "S(S(S(a)\n\nS(b))\n\nS(S(c)))"
+
+
+def test_prepare_summaries_for_synthesis_drops_repeated_lines():
+    shared_line = "- Committed to net-zero greenhouse gas emissions across operations by 2050."
+    summaries = {
+        "Acme": f"**Environmental**\n{shared_line}\n- Acme recycles 80% of its manufacturing waste.",
+        "Globex": f"**Environmental**\n{shared_line.upper()}\n- Globex sources 60% renewable electricity.",
+    }
+
+    compacted = prepare_summaries_for_synthesis(summaries)
+
+    assert compacted["Acme"] == summaries["Acme"]
+    assert compacted["Globex"] == "**Environmental**\n- Globex sources 60% renewable electricity."
+
+
+def test_prepare_summaries_for_synthesis_caps_summary_length():
+    summary = "\n".join(f"Line {i} describing a distinct sustainability initiative in detail." for i in range(50))
+
+    compacted = prepare_summaries_for_synthesis({"Acme": summary}, max_chars_per_summary=500)
+
+    assert len(compacted["Acme"]) <= 500
+    assert compacted["Acme"].startswith("Line 0 ")
@@ -1,16 +1,33 @@
+import concurrent.futures
+
+import pytest
 from research_agent.search_tool import (
+    _get_ddgs,
     _perform_duckduckgo_search,
+    _search_cache,
+    _thread_local,
+    fetch_search_results,
     search_langchain_tool,
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_search_cache():
+    """Start every test with an empty search cache and no reused DDGS client."""
+    _search_cache.clear()
+    _thread_local.__dict__.clear()
+    yield
+    _search_cache.clear()
+    _thread_local.__dict__.clear()
+
+
 # Test the internal search function directly
 def test_perform_duckduckgo_search_success(mocker):
     """Test successful search and formatting."""
     mock_ddgs_class = mocker.patch(
         "research_agent.search_tool.DDGS",
     )
-    mock_ddgs_instance = mock_ddgs_class.return_value.__enter__.return_value
+    mock_ddgs_instance = mock_ddgs_class.return_value
     mock_ddgs_instance.text.return_value = [
         {"title": "Result 1", "href": "http://example.com/1", "body": "Snippet 1..."},
         {"title": "Result 2", "href": "http://example.com/2", "body": "Snippet 2..."},
@@ -34,7 +51,7 @@ def test_perform_duckduckgo_search_no_results(mocker):
     mock_ddgs_class = mocker.patch(
         "research_agent.search_tool.DDGS",
     )
-    mock_ddgs_instance = mock_ddgs_class.return_value.__enter__.return_value
+    mock_ddgs_instance = mock_ddgs_class.return_value
     mock_ddgs_instance.text.return_value = []
 
     query = "unlikely query"
@@ -49,7 +66,7 @@ def test_perform_duckduckgo_search_error(mocker):
     mock_ddgs_class = mocker.patch(
         "research_agent.search_tool.DDGS",
     )
-    mock_ddgs_instance = mock_ddgs_class.return_value.__enter__.return_value
+    mock_ddgs_instance = mock_ddgs_class.return_value
     mock_ddgs_instance.text.side_effect = Exception("Search engine down")
 
     query = "error query"
@@ -59,6 +76,37 @@ def test_perform_duckduckgo_search_error(mocker):
     assert "Search engine down" in result
 
 
+def test_perform_duckduckgo_search_uses_cache_for_repeated_query(mocker):
+    """Test that an identical repeated search is answered from the cache."""
+    mock_ddgs_class = mocker.patch(
+        "research_agent.search_tool.DDGS",
+    )
+    mock_ddgs_instance = mock_ddgs_class.return_value
+    mock_ddgs_instance.text.return_value = [
+        {"title": "Result 1", "href": "http://example.com/1", "body": "Snippet 1..."},
+    ]
+
+    first = _perform_duckduckgo_search("repeated query")
+    second = _perform_duckduckgo_search("repeated query")
+
+    assert first == second
+    mock_ddgs_instance.text.assert_called_once_with("repeated query", max_results=5)
+
+
+def test_get_ddgs_reuses_client_per_thread(mocker):
+    """Test that a thread reuses its DDGS client while other threads get their own."""
+    mock_ddgs_class = mocker.patch("research_agent.search_tool.DDGS", side_effect=lambda: object())
+
+    first = _get_ddgs()
+    second = _get_ddgs()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        other_thread_client = executor.submit(_get_ddgs).result()
+
+    assert first is second
+    assert other_thread_client is not first
+    assert mock_ddgs_class.call_count == 2
+
+
 # Test the LangChain Tool wrapper
 def test_search_langchain_tool_run(mocker):
     """Test running the search via the LangChain Tool wrapper."""
@@ -77,3 +125,19 @@ def test_search_langchain_tool_attributes():
     assert search_langchain_tool.name == "DuckDuckGo Search"
     assert search_langchain_tool.description is not None
     assert callable(search_langchain_tool.func)
+
+
+def test_fetch_search_results_without_cache_searches_again_and_refreshes_cache(mocker):
+    """Test that use_cache=False bypasses a cached result but stores the fresh one."""
+    mock_ddgs_instance = mocker.patch("research_agent.search_tool.DDGS").return_value
+    mock_ddgs_instance.text.side_effect = [
+        [{"title": "Old", "href": "http://example.com/old", "body": "..."}],
+        [{"title": "New", "href": "http://example.com/new.pdf", "body": "..."}],
+    ]
+
+    fetch_search_results("report query")
+    fresh = fetch_search_results("report query", use_cache=False)
+
+    assert fresh[0]["title"] == "New"
+    assert mock_ddgs_instance.text.call_count == 2
+    assert fetch_search_results("report query")[0]["title"] == "New"
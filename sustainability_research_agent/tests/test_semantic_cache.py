@@ -0,0 +1,58 @@
+import asyncio
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from research_agent.semantic_cache import SemanticCache
+
+
+def test_semantic_cache_hits_on_similar_text_and_persists(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=64)
+    cache = SemanticCache(embeddings, tmp_path)
+
+    asyncio.run(cache.aupdate("Acme sustainability report 2024", "Acme summary", label="Acme"))
+
+    assert asyncio.run(cache.alookup("Acme sustainability report 2024", label="Acme")) == "Acme summary"
+    assert asyncio.run(cache.alookup("Globex annual report", label="Acme")) is None
+    reloaded_cache = SemanticCache(embeddings, tmp_path)
+    assert asyncio.run(reloaded_cache.alookup("Acme sustainability report 2024", label="Acme")) == "Acme summary"
+
+
+def test_semantic_cache_only_hits_for_the_same_label(tmp_path):
+    # Only the first 16 characters are embedded, so these texts are indistinguishable to the cache
+    cache = SemanticCache(DeterministicFakeEmbedding(size=64), tmp_path, embed_chars=16)
+    asyncio.run(cache.aupdate("Sustainability report 2024 (Acme)", "Acme summary", label="Acme"))
+
+    assert asyncio.run(cache.alookup("Sustainability report 2024 (Acme Inc.)", label=" ACME ")) == "Acme summary"
+    assert asyncio.run(cache.alookup("Sustainability report 2024 (Globex)", label="Globex")) is None
+
+
+def test_semantic_cache_treats_embedding_failures_as_misses(tmp_path, mocker):
+    embeddings = DeterministicFakeEmbedding(size=64)
+    mocker.patch.object(DeterministicFakeEmbedding, "aembed_query", side_effect=RuntimeError("quota exceeded"))
+    cache = SemanticCache(embeddings, tmp_path)
+
+    asyncio.run(cache.aupdate("Acme sustainability report 2024", "Acme summary"))
+
+    assert asyncio.run(cache.alookup("Acme sustainability report 2024")) is None
+    assert not (tmp_path / "vectors.npy").exists()
+
+
+def test_semantic_cache_treats_index_dimension_mismatch_as_miss(tmp_path):
+    asyncio.run(SemanticCache(DeterministicFakeEmbedding(size=64), tmp_path).aupdate("Acme report", "Acme summary"))
+    cache = SemanticCache(DeterministicFakeEmbedding(size=32), tmp_path)  # Embedding model changed since
+
+    assert asyncio.run(cache.alookup("Acme report")) is None
+    asyncio.run(cache.aupdate("Globex report", "Globex summary"))  # Must not raise either
+
+
+def test_semantic_cache_grows_beyond_initial_capacity(tmp_path, mocker):
+    mocker.patch("research_agent.semantic_cache.INITIAL_CAPACITY", 2)
+    cache = SemanticCache(DeterministicFakeEmbedding(size=16), tmp_path)
+
+    for i in range(5):
+        asyncio.run(cache.aupdate(f"Report {i}", f"Summary {i}"))
+
+    assert [asyncio.run(cache.alookup(f"Report {i}")) for i in range(5)] == [f"Summary {i}" for i in range(5)]
+    reloaded = SemanticCache(DeterministicFakeEmbedding(size=16), tmp_path)
+    assert asyncio.run(reloaded.alookup("Report 4")) == "Summary 4"
+    assert np.load(tmp_path / "vectors.npy").shape == (5, 16)
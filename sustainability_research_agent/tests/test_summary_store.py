@@ -0,0 +1,21 @@
+from research_agent.summary_store import get_cached_summary, save_summary
+
+
+def test_summary_store_round_trip(tmp_path):
+    db_path = tmp_path / "summaries.db"
+
+    assert get_cached_summary(db_path, "key") is None
+    save_summary(db_path, "key", "Acme", "Acme summary")
+    save_summary(db_path, "key", "Acme", "Updated Acme summary")
+
+    assert get_cached_summary(db_path, "key") == "Updated Acme summary"
+
+
+def test_summary_store_expires_entries(tmp_path, mocker):
+    db_path = tmp_path / "summaries.db"
+    mock_time = mocker.patch("research_agent.summary_store.time.time", return_value=1000.0)
+    save_summary(db_path, "key", "Acme", "Acme summary", ttl_seconds=60)
+
+    mock_time.return_value = 1061.0
+
+    assert get_cached_summary(db_path, "key") is None
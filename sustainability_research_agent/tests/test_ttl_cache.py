@@ -0,0 +1,33 @@
+from research_agent.ttl_cache import TTLCache
+
+
+def test_ttl_cache_returns_stored_values():
+    cache = TTLCache(maxsize=2, ttl_seconds=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("missing") is None
+    assert cache.get("missing", "default") == "default"
+
+
+def test_ttl_cache_expires_entries(mocker):
+    mock_monotonic = mocker.patch("research_agent.ttl_cache.time.monotonic", return_value=100.0)
+    cache = TTLCache(maxsize=2, ttl_seconds=10)
+    cache.set("a", 1)
+
+    mock_monotonic.return_value = 111.0
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl_seconds=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used entry
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3